@@ -0,0 +1,37 @@
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from plugins.api_emoji_store.api_emoji_store import read_index
+
+
+# Worst cases of the store search: one letter and short code point prefixes match most of the store
+QUERIES: tuple[str, ...] = ('e', 's', '1F', '1F6', 'face', 'grinning face', 'heart red', 'thumbs up', 'smiling cat')
+RUNS: int = 50
+LIMIT_MS: float = 1.0
+
+
+def best_ms(search, query: str) -> float:
+    best: float = float('inf')
+    for _ in range(RUNS):
+        start: float = perf_counter()
+        search(query)
+        best = min(best, perf_counter() - start)
+    return best * 1e3
+
+
+start: float = perf_counter()
+index = read_index()
+print(f'read_index: {(perf_counter() - start) * 1e3:.1f} ms, {len(index)} emojis')
+
+slow: list[str] = list()
+for query in QUERIES:
+    ms: float = best_ms(index.search.search, query)
+    print(f'{query!r:20} {len(index.search.search(query)):5} results {ms:.3f} ms')
+    if ms > LIMIT_MS:
+        slow.append(query)
+
+if slow:
+    sys.exit(f'Slower than {LIMIT_MS} ms: {", ".join(map(repr, slow))}')
@@ -0,0 +1,51 @@
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from emoji import EMOJI_DATA, is_emoji
+
+from plugins.api_emoji_store.api_emoji_store import read_index
+from plugins.api_emoji_validator.api_emoji_validator import api_is_emoji
+
+
+# api_is_emoji against emoji.is_emoji (the validator it replaced) on three kinds of values:
+# hits of the store allow-set, misses (not emojis) and emojis only emoji knows (the lru_cache fallback)
+ROUNDS: int = 100
+# Lowest accepted api_is_emoji / is_emoji rate: hits must be faster, misses and fallback values pay
+# the allow-set lookup (and the lru_cache call) on top of the emoji lookup
+MIN_SPEEDUP: dict[str, float] = {'hits': 1.0, 'misses': 0.2, 'fallback': 0.2}
+
+
+def best_rates(validators: tuple, values: list) -> list[float]:
+    """ Validations per second of every validator, rounds are interleaved so load spikes hit all of them """
+    best: list[float] = [float('inf')] * len(validators)
+    for _ in range(ROUNDS):
+        for i, validate in enumerate(validators):
+            start: float = perf_counter()
+            for value in values:
+                validate(value)
+            best[i] = min(best[i], perf_counter() - start)
+    return [len(values) / seconds for seconds in best]
+
+
+known: set[str] = set(read_index().characters)
+kinds: dict[str, list] = {
+    'hits': sorted(known),
+    'misses': ['', 'a', 'ab', '12', '#', ':)', '<3', 'x' * 20, None, 7] * 100,
+    'fallback': sorted(value for value in EMOJI_DATA if value not in known)[:1000]
+}
+
+slow: list[str] = list()
+for kind, values in kinds.items():
+    old_rate, api_rate = best_rates((is_emoji, api_is_emoji), values)
+    print(
+        f'{kind:8} {len(values):5} values  is_emoji {old_rate / 1e6:5.2f}M/s  '
+        f'api_is_emoji {api_rate / 1e6:5.2f}M/s  x{api_rate / old_rate:.2f}'
+    )
+    if api_rate < old_rate * MIN_SPEEDUP[kind]:
+        slow.append(kind)
+
+if slow:
+    sys.exit(f'api_is_emoji regressed on: {", ".join(slow)} (see MIN_SPEEDUP)')
@@ -0,0 +1,69 @@
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import NamedTuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from models.ModelArt import ModelArt
+from plugins.api_emart.api_emart import _FRAME_ENTRY, _HEADER, api_append_emart, api_write_emart
+
+
+# Hand-corrupted .emart projects: a palette code past the end of the palette, in a frame and in a log record.
+# Opening them must fail with ValueError (refused by Ctrl+O), never later with IndexError.
+VALUES: tuple[str | None, ...] = (None, '😀', '🐱')
+COLUMNS, ROWS = 4, 3
+
+
+class Frame(NamedTuple):
+    columns: int
+    rows: int
+    codes: array
+
+
+def write_project(filepath: str) -> int:
+    frames: list[Frame] = [Frame(COLUMNS, ROWS, array('H', [i % len(VALUES) for i in range(COLUMNS * ROWS)]))] * 2
+    return api_write_emart(filepath, frames, VALUES)
+
+
+def corrupt_frame(filepath: str) -> None:
+    write_project(filepath)
+    with open(filepath, 'r+b') as file:
+        table_offset: int = _HEADER.unpack(file.read(_HEADER.size))[5]
+        file.seek(table_offset + _FRAME_ENTRY.size)
+        grid_offset: int = _FRAME_ENTRY.unpack(file.read(_FRAME_ENTRY.size))[0]
+        file.seek(grid_offset + 2 * 5)
+        file.write(struct.pack('<H', len(VALUES)))
+
+
+def corrupt_log_record(filepath: str) -> None:
+    size: int = write_project(filepath)
+    # The record is well formed (its crc matches), only the code is out of the palette
+    codes: array = array('H', bytes(2 * COLUMNS * ROWS))
+    codes[7] = 0xFFFF
+    api_append_emart(filepath, size, 2, {1: Frame(COLUMNS, ROWS, codes)}, VALUES, len(VALUES))
+
+
+def expect_refused(filepath: str) -> None:
+    try:
+        ModelArt().open_project(filepath)
+    except ValueError as error:
+        print(f'{os.path.basename(filepath)}: refused ({error})')
+        return
+    sys.exit(f'{os.path.basename(filepath)}: a corrupt project was opened')
+
+
+with tempfile.TemporaryDirectory() as directory:
+    valid: str = os.path.join(directory, 'valid.emart')
+    write_project(valid)
+    ModelArt().open_project(valid)
+    print(f'valid.emart: {ModelArt().art_board.count()} frames')
+
+    for corrupt in (corrupt_frame, corrupt_log_record):
+        filepath: str = os.path.join(directory, f'{corrupt.__name__}.emart')
+        corrupt(filepath)
+        expect_refused(filepath)
+
+    ModelArt().art_board.close_source()
@@ -1,9 +1,24 @@
+import gzip
 import json
 
 
-with open(file='emoji-art.json', mode='r', encoding='utf-8') as file:
-    data: dict = json.load(fp=file)
+def frame_text(data: dict, frame: dict) -> str:
+    if data.get('version', 1) == 1:
+        return frame['text']
+
+    # version 2: rows of [code, count, ...] runs over the project palette
+    texts: list[str] = ['▫️' if value is None else value for value in data['palette']]
+    return '\n'.join(
+        ''.join(texts[code] * count for code, count in zip(runs[0::2], runs[1::2])) for runs in frame['rle']
+    ) + '\n'
+
+
+with open(file='emoji-art.json', mode='rb') as file:
+    content: bytes = file.read()
+    data: dict = json.loads(gzip.decompress(content) if content.startswith(b'\x1f\x8b') else content)
 
     for i in range(data['frames']):
-        print(data[f'frame:{i}']['text'])
+        if f'frame:{i}' not in data:
+            break
+        print(frame_text(data, data[f'frame:{i}']))
         print()
@@ -92,12 +92,7 @@ class ComponentArtBoard(QTableWidget):
         self._timer.setInterval(2000)
 
         # Create columns, rows
-        for column in range(columns):
-            for row in range(rows):
-                item = QTableWidgetItem()
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-                self.setItem(row, column, item)
+        self._create_items()
 
         # Set css style
         self.setStyleSheet(path_read_file(file='art_board.css'))
@@ -115,6 +110,24 @@ class ComponentArtBoard(QTableWidget):
         self.resizeColumnsToContents()
         self.resizeRowsToContents()
 
+    def resize_table(self, columns: int, rows: int):
+        if (columns, rows) == self.table_size():
+            return
+
+        self.setColumnCount(columns)
+        self.setRowCount(rows)
+        self._create_items()
+
+    def _create_items(self):
+        for column in range(self.columnCount()):
+            for row in range(self.rowCount()):
+                if self.item(row, column) is not None:
+                    continue
+                item = QTableWidgetItem()
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
+                self.setItem(row, column, item)
+
     @staticmethod
     def _change_style(widget, name: str):
         widget_style = widget.style()
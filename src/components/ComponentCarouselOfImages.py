@@ -65,6 +65,9 @@ class _ComponentCarouselItem(QWidget):
     def update_title(self, title: str):
         self._pushbutton.setText(title)
 
+    def update_pixmap(self, pixmap: QPixmap):
+        self._label.setPixmap(pixmap)
+
 
 class ComponentCarouselOfImages(QWidget):
     def __init__(self, parent: QWidget):
@@ -93,6 +96,8 @@ class ComponentCarouselOfImages(QWidget):
         # QHBoxLayout
         self._hbox_layout: QHBoxLayout = QHBoxLayout(self._widget)
         self._scroll_area.setWidget(self._widget)
+        # Items in the layout, a thumbnail rendered for a deleted item is dropped without a scan of the layout
+        self._items: set[QWidget] = set()
 
         # QVBoxLayout
         self._vbox_layout = QVBoxLayout(self)
@@ -172,18 +177,29 @@ class ComponentCarouselOfImages(QWidget):
         )
         item.bind_to_controller(controller=self._controller)
         self._hbox_layout.addWidget(item, alignment=Qt.AlignmentFlag.AlignLeft)
+        self._items.add(item)
         self._notification.set_hide(hide=True)
 
-    def add_carousel_item_pixmap(self, pixmap: QPixmap) -> None:
+    def add_carousel_item_pixmap(self, pixmap: QPixmap) -> QWidget:
         item = _ComponentCarouselItem(
             pixmap=pixmap, title=f'del: [{self._hbox_layout.count()}]'
         )
         item.bind_to_controller(controller=self._controller)
         self._hbox_layout.addWidget(item, alignment=Qt.AlignmentFlag.AlignLeft)
+        self._items.add(item)
         self._notification.set_hide(hide=True)
+        return item
+
+    def update_carousel_item_pixmap(self, widget: QWidget, pixmap: QPixmap) -> bool:
+        if widget not in self._items:
+            return False
+
+        widget.update_pixmap(pixmap)
+        return True
 
     def del_carousel_item(self, index: int) -> None:
         widget: QWidget = self.item(index).widget()
+        self._items.discard(widget)
         self._hbox_layout.removeWidget(widget)
         widget.deleteLater()
         del widget
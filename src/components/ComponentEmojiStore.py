@@ -1,83 +1,316 @@
-from PySide6.QtCore import Qt
+from abc import abstractmethod
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import NamedTuple, Sequence
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtGui import QColor, QFont, QPainter
 from PySide6.QtWidgets import (
     QWidget,
-    QLabel,
     QVBoxLayout,
-    QScrollArea,
-    QGridLayout,
+    QLineEdit,
+    QListView,
     QSizePolicy,
-    QFrame
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QFrame,
+    QAbstractItemView
 )
 
 from paths import path_read_file
 
 
-class _Title(QLabel):
-    def __init__(self, parent, title: str):
-        super().__init__(title, parent)
-        self.setObjectName('label-title-emoji-store')
+# Emojis per row and the painted look of rows and titles (the items are painted, css does not reach them)
+_COLUMNS: int = 6
+_CELL_SIZE: int = 40
+_EMOJI_FONT_SIZE: int = 24
+_TITLE_FONT_SIZE: int = 14
+_TITLE_PADDING: int = 8
+_TITLE_BACKGROUND: str = '#282A36'
+_TITLE_COLOR: str = '#61AFEF'
+_HOVER_BACKGROUND: str = '#61AFEF'
+_TITLE_COLLAPSED: str = '▸'
+_TITLE_EXPANDED: str = '▾'
+_ROW_ROLE: int = Qt.ItemDataRole.UserRole
 
 
-class ComponentEmojiStore(QFrame):
+@dataclass
+class _ContractEmojiIndex:
+    categories: list[str]
+    characters: list[str]
+
+    @abstractmethod
+    def category_emojis(self, category: int) -> range:
+        pass
+
+
+class _Row(NamedTuple):
+    """ A category title or up to _COLUMNS emoji ids (category is -1 for rows of search results) """
+    category: int
+    emojis: Sequence[int]
+    is_title: bool = False
+
+
+class _EmojiStoreModel(QAbstractListModel):
+    """
+        One item per painted row: every category is a title row, an expanded category is followed by its emojis,
+        _COLUMNS per row. Rows are computed from the category of the row (bisect over row offsets per category),
+        nothing is built per emoji: a collapsed category costs one row and expanding it only inserts row numbers.
+        While a filter is set the rows are the filtered emojis only, without titles.
+    """
+
     def __init__(self, parent: QWidget):
         super().__init__(parent)
+        self._index: _ContractEmojiIndex | None = None
+        self._expanded: list[bool] = list()
+        self._row_offsets: list[int] = [0]
+        self._filter: list[int] | None = None
+
+    def set_index(self, index: _ContractEmojiIndex):
+        self._index = index
+        self.set_expanded(set())
+
+    def set_expanded(self, expanded: set[str]):
+        self.beginResetModel()
+        self._expanded = [category in expanded for category in self._index.categories]
+        self._update_row_offsets()
+        self.endResetModel()
+
+    def _category_rows(self, category: int) -> int:
+        return -(-len(self._index.category_emojis(category)) // _COLUMNS)
+
+    def _emoji_rows(self, category: int) -> int:
+        return self._category_rows(category) if self._expanded[category] else 0
+
+    def _update_row_offsets(self):
+        self._row_offsets = [0]
+        for category in range(len(self._expanded)):
+            self._row_offsets.append(self._row_offsets[-1] + 1 + self._emoji_rows(category))
+
+    def is_expanded(self, category: int) -> bool:
+        return self._expanded[category]
+
+    def expanded(self) -> list[str]:
+        return [title for title, expanded in zip(self._index.categories, self._expanded) if expanded]
+
+    def toggle(self, category: int):
+        first: int = self._row_offsets[category] + 1
+        last: int = first + self._category_rows(category) - 1
+        if last < first:
+            self._expanded[category] = not self._expanded[category]
+        elif self._expanded[category]:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._expanded[category] = False
+            self._update_row_offsets()
+            self.endRemoveRows()
+        else:
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._expanded[category] = True
+            self._update_row_offsets()
+            self.endInsertRows()
+        # The arrow of the title row
+        self.dataChanged.emit(self.index(first - 1), self.index(first - 1))
+
+    def set_filter(self, emojis: list[int] | None):
+        """ Show only these emoji ids, None shows the categories again """
+        self.beginResetModel()
+        self._filter = emojis
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if self._filter is not None:
+            return -(-len(self._filter) // _COLUMNS)
+        return self._row_offsets[-1]
+
+    def row(self, row: int) -> _Row:
+        if self._filter is not None:
+            return _Row(-1, self._filter[row * _COLUMNS:(row + 1) * _COLUMNS])
+
+        category: int = bisect_right(self._row_offsets, row) - 1
+        local: int = row - self._row_offsets[category]
+        if local == 0:
+            return _Row(category, (), True)
+
+        emojis: range = self._index.category_emojis(category)
+        start: int = emojis.start + (local - 1) * _COLUMNS
+        return _Row(category, range(start, min(start + _COLUMNS, emojis.stop)))
+
+    def character(self, emoji: int) -> str:
+        return self._index.characters[emoji]
+
+    def title(self, category: int) -> str:
+        return self._index.categories[category]
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row: _Row = self.row(index.row())
+        if role == _ROW_ROLE:
+            return row
+        if role == Qt.ItemDataRole.DisplayRole:
+            if row.is_title:
+                return self.title(row.category)
+            return ''.join(self._index.characters[emoji] for emoji in row.emojis)
+        return None
+
+
+class _EmojiStoreDelegate(QStyledItemDelegate):
+    def __init__(self, parent: QWidget, model: _EmojiStoreModel):
+        super().__init__(parent)
+        self._model = model
+
+        self._emoji_font = QFont()
+        self._emoji_font.setPixelSize(_EMOJI_FONT_SIZE)
+        self._title_font = QFont()
+        self._title_font.setPixelSize(_TITLE_FONT_SIZE)
+        self._title_font.setWeight(QFont.Weight.Medium)
+
+        self.hover_column: int = -1
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        # Titles are as high as emoji rows, so the view lays out uniform items without asking every row
+        return QSize(_COLUMNS * _CELL_SIZE, _CELL_SIZE)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        row: _Row = index.data(_ROW_ROLE)
+        rect: QRect = option.rect
+        painter.save()
+
+        if row.is_title:
+            painter.fillRect(rect, QColor(_TITLE_BACKGROUND))
+            painter.setFont(self._title_font)
+            painter.setPen(QColor(_TITLE_COLOR))
+            arrow: str = _TITLE_EXPANDED if self._model.is_expanded(row.category) else _TITLE_COLLAPSED
+            painter.drawText(
+                rect.adjusted(_TITLE_PADDING, 0, -_TITLE_PADDING, 0),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                f'{arrow} {self._model.title(row.category)}'
+            )
+            painter.restore()
+            return
+
+        painter.setFont(self._emoji_font)
+        hover: bool = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        for column, emoji in enumerate(row.emojis):
+            cell = QRect(rect.x() + column * _CELL_SIZE, rect.y(), _CELL_SIZE, rect.height())
+            if hover and column == self.hover_column:
+                painter.fillRect(cell, QColor(_HOVER_BACKGROUND))
+            painter.drawText(cell, Qt.AlignmentFlag.AlignCenter, self._model.character(emoji))
+        painter.restore()
+
+
+class _EmojiStoreView(QListView):
+    def __init__(self, parent: QWidget, model: _EmojiStoreModel):
+        super().__init__(parent)
+        self._model = model
+        self._delegate = _EmojiStoreDelegate(self, model)
+        self.event_click = None
+        self.event_toggle = None
+
+        self.setModel(model)
+        self.setItemDelegate(self._delegate)
+        self.setMouseTracking(True)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
 
-        self._event = None
+    def hit_test(self, pos) -> tuple[_Row | None, int]:
+        """ Row and column of the cell at a viewport position, (None, -1) outside of the items """
+        index: QModelIndex = self.indexAt(pos)
+        if not index.isValid():
+            return None, -1
 
-        # QScrollArea
-        self._scroll_area = QScrollArea(self)
-        self._scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self._scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
-        self._scroll_area.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
-        self._scroll_area.setWidgetResizable(True)
+        row: _Row = self._model.row(index.row())
+        column: int = (pos.x() - self.visualRect(index).x()) // _CELL_SIZE
+        if row.is_title:
+            return row, column
+        return row, column if 0 <= column < len(row.emojis) else -1
 
-        # QHBoxLayout
-        self._widget = QWidget()
-        self._grid_layout: QGridLayout = QGridLayout(self._widget)
-        self._scroll_area.setWidget(self._widget)
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        _, column = self.hit_test(event.position().toPoint())
+        if column != self._delegate.hover_column:
+            self._delegate.hover_column = column
+            self.viewport().update()
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self._delegate.hover_column = -1
+        self.viewport().update()
+
+    def mousePressEvent(self, event):
+        row, column = self.hit_test(event.position().toPoint())
+        if row is None:
+            return
+        if row.is_title:
+            self._model.toggle(row.category)
+            if self.event_toggle is not None:
+                self.event_toggle(self._model.expanded())
+        elif self.event_click is not None and column >= 0:
+            self.event_click(event, self._model.character(row.emojis[column]))
+
+
+class ComponentEmojiStore(QFrame):
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+
+        # QLineEdit: filters the store on every keystroke
+        self._search = QLineEdit(self)
+        self._search.setPlaceholderText('Search')
+        self._search.setClearButtonEnabled(True)
+
+        # QListView: only the visible rows are painted
+        self._model = _EmojiStoreModel(self)
+        self._view = _EmojiStoreView(self, self._model)
+        self._view.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
 
         # QVBoxLayout
         self._vbox_layout = QVBoxLayout(self)
-        self._vbox_layout.addWidget(self._scroll_area)
+        self._vbox_layout.addWidget(self._search)
+        self._vbox_layout.addWidget(self._view)
         self._vbox_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.setLayout(self._vbox_layout)
 
         # Layouts indents
         self.setContentsMargins(0, 0, 0, 0)
-        self._widget.setContentsMargins(0, 0, 0, 0)
-        self._scroll_area.setContentsMargins(0, 0, 0, 0)
-        self._grid_layout.setContentsMargins(0, 0, 0, 0)
+        self._view.setContentsMargins(0, 0, 0, 0)
         self._vbox_layout.setContentsMargins(0, 0, 0, 0)
-        self._grid_layout.setSpacing(0)
         self._vbox_layout.setSpacing(0)
 
         # Widgets: change object name for css style
-        self._widget.setObjectName('widget-emoji-store')
+        self._view.setObjectName('widget-emoji-store')
+        self._search.setObjectName('line-edit-search-emoji-store')
         self.setObjectName('frame-emoji-store')
 
         # Set css style
         self.setStyleSheet(path_read_file(file='emoji_store.css'))
-
-    """ Event """
-    def mousePressEvent(self, event):
-        if self._event is not None:
-            widget = self._grid_layout.itemAt(self._grid_layout.indexOf(self.childAt(event.pos())))
-            if widget and not isinstance(self.childAt(event.pos()), _Title):
-                self._event(event, widget.widget())
+        self._view.setFixedWidth(
+            _COLUMNS * _CELL_SIZE + self._view.verticalScrollBar().sizeHint().width() + 2 * self._view.frameWidth()
+        )
 
     """ Methods """
     # bind MVC controller
     def bind_to_controller(self, controller):
-        self._event = controller.on_click_emoji_store
+        self._view.event_click = controller.on_click_emoji_store
+        self._view.event_toggle = controller.on_toggle_emoji_store_category
+        self._search.textChanged.connect(controller.on_search_emoji_store)
 
-    def add_row(self, row: list[str]):
-        row_count: int = self._grid_layout.rowCount()
+    def set_index(self, index: _ContractEmojiIndex):
+        """ Fill the store, every category starts collapsed """
+        self._model.set_index(index)
 
-        for column, text in enumerate(row):
-            label = QLabel(text)
-            label.setObjectName('label-row-emoji-store')
-            self._grid_layout.addWidget(label, row_count, column, alignment=Qt.AlignmentFlag.AlignCenter)
+    def set_expanded(self, expanded: set[str]):
+        """ Expand the categories with these titles and collapse the others """
+        self._model.set_expanded(expanded)
 
-    def add_title(self, title: str):
-        widget_title = _Title(self, title)
-        self._grid_layout.addWidget(widget_title, self._grid_layout.rowCount(), 0, 1, 0)
+    def set_filter(self, emojis: list[int] | None):
+        """ Show only these emoji ids of the index (search results), None shows the categories """
+        self._model.set_filter(emojis)
+        self._view.scrollToTop()
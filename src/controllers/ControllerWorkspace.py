@@ -1,6 +1,8 @@
-from emoji import is_emoji
+import os
+from array import array
+from typing import NamedTuple
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QSettings, QThreadPool, QTimer
 
 from PySide6.QtGui import (
     QGuiApplication,
@@ -11,6 +13,7 @@ from PySide6.QtGui import (
 )
 
 from PySide6.QtWidgets import (
+    QWidget,
     QLabel,
     QPushButton,
     QMessageBox,
@@ -24,12 +27,20 @@ from models.ModelEmojiHistory import (
     LimitEntryError
 )
 
+from util import UtilWorker, util_convert_text_to_pixmap
 from views.ViewWorkspace import ViewWorkspace
 from controllers.DefaultController import DefaultController
-from settings import SETTINGS_SHORTCUTS, SETTINGS_SHORTCUTS_HTML
+from settings import SETTINGS_SHORTCUTS, SETTINGS_SHORTCUTS_HTML, SETTINGS_DRAW_TABLE, SETTINGS_EXPORT_ANIMATION, \
+    SETTINGS_EXPORT_FRAMES_INDENT, SETTINGS_EXPORT_FRAMES_VERSION, SETTINGS_AUTOSAVE, SETTINGS_PROJECT_LOG, \
+    SETTINGS_UI_STATE
 
 from plugins.api_draw_table.api_draw_table import ApiDrawTable
+from plugins.api_emoji_store import api_emoji_store
+from plugins.api_emoji_validator.api_emoji_validator import api_is_emoji
 from plugins.api_export_frames.api_export_frames import api_export_frames
+from plugins.api_export_images.api_export_images import api_export_images
+from plugins.api_export_animation.api_export_animation import api_export_animation
+from plugins.api_emart.api_emart import api_write_emart, api_append_emart
 
 
 class _ControllerArtBoard:
@@ -58,7 +69,46 @@ class _ControllerArtBoard:
 
         if reply == QMessageBox.StandardButton.Yes:
             self.component_art_board.clear_cells_text()
-            self.model.art_board.art.clear_cells()
+            self.model.art_board.clear_art()
+            self.schedule_autosave()
+
+    def on_press_shortcut_undo(self):
+        entry = self.model.art_board.undo()
+
+        if entry is None:
+            self.view.show_toast_message(title='Error', message='Nothing to undo', duration=2000)
+            return
+
+        self._show_journal_entry(entry)
+        self.schedule_autosave()
+
+    def on_press_shortcut_redo(self):
+        entry = self.model.art_board.redo()
+
+        if entry is None:
+            self.view.show_toast_message(title='Error', message='Nothing to redo', duration=2000)
+            return
+
+        self._show_journal_entry(entry)
+        self.schedule_autosave()
+
+    def _show_journal_entry(self, entry):
+        """ Redraw the cells of an undone / redone edit, or the thumbnail of its frame if it is in the carousel """
+        if entry.frame == self.model.art_board.index:
+            self._update_cells_text(entry.indexes)
+            return
+
+        self._finish_carousel_fill()
+        self._render_carousel_item(
+            self.component_carousel_of_images.item(entry.frame).widget(), self.model.art_board.snapshot(entry.frame)
+        )
+
+    def _update_cells_text(self, indexes):
+        for cell in self.model.art_board.art.cells(indexes):
+            if cell.is_empty():
+                self.component_art_board.clear_cell_text(cell.column, cell.row)
+            else:
+                self.component_art_board.set_cell_text(cell.column, cell.row, cell.value)
 
     """ 
         Art board
@@ -92,7 +142,7 @@ class _ControllerArtBoard:
             case 3:
                 clipboard_text: str = self.clipboard.text()
 
-                if not is_emoji(clipboard_text):
+                if not api_is_emoji(clipboard_text):
                     action.setDisabled(True)
                     return
 
@@ -126,42 +176,63 @@ class _ControllerArtBoard:
                 selected_indexes = self.component_art_board.selectedIndexes()
                 for index in selected_indexes:
                     self.component_art_board.itemFromIndex(index).setText(text)
-                    self.model.art_board.art.change_cell(column=index.column(), row=index.row(), value=text)
+                self.model.art_board.edit_cells(
+                    cells=[(index.column(), index.row()) for index in selected_indexes], value=text
+                )
                 self.component_art_board.clearSelection()
+                self.schedule_autosave()
             case 4:
                 selected_indexes = self.component_art_board.selectedIndexes()
                 for index in selected_indexes:
                     self.component_art_board.itemFromIndex(index).setText('')
-                    self.model.art_board.art.clear_cell(column=index.column(), row=index.row())
+                self.model.art_board.edit_cells(
+                    cells=[(index.column(), index.row()) for index in selected_indexes], value=None
+                )
                 self.component_art_board.clearSelection()
+                self.schedule_autosave()
 
     def on_click_cell(self, row: int, column: int):
         clipboard_text: str = self.clipboard.text()
         self.component_art_board.clearSelection()
 
-        if not is_emoji(clipboard_text):
+        if not api_is_emoji(clipboard_text):
             self.view.show_toast_message(
                 title='Error',
                 message='A cell can only contain the emoji value',
                 duration=2000
             )
-        elif not self.component_art_board.get_cell_text(column, row):
+            return
+
+        if not self.component_art_board.get_cell_text(column, row):
             self.component_art_board.set_cell_text(column, row, clipboard_text)
-            self.model.art_board.art.change_cell(column, row, clipboard_text)
+            self.model.art_board.edit_cells([(column, row)], clipboard_text)
         else:
             self.component_art_board.clear_cell_text(column, row)
-            self.model.art_board.art.clear_cell(column, row)
+            self.model.art_board.edit_cells([(column, row)], None)
+        self.schedule_autosave()
 
 
 class _ControllerEmojiStore:
+    _STATE_EXPANDED: str = 'emoji_store/expanded'
+
     def __init__(self, view: ViewWorkspace, model2: ModelEmojiHistory, clipboard):
         self.view = view
         self.model2 = model2
         self.clipboard = clipboard
         self.component_emoji_history = self.view.component_emoji_history
+        self._ui_state = QSettings(SETTINGS_UI_STATE['organization'], SETTINGS_UI_STATE['application'])
+
+        # Categories expanded on the last run, QSettings returns a single item list as a str and an empty one as None
+        expanded = self._ui_state.value(self._STATE_EXPANDED) or list()
+        self.view.component_emoji_store.set_expanded({expanded} if isinstance(expanded, str) else set(expanded))
 
-    def on_click_emoji_store(self, event, widget: QLabel):
-        text: str = widget.text()
+    def on_toggle_emoji_store_category(self, expanded: list[str]):
+        self._ui_state.setValue(self._STATE_EXPANDED, expanded)
+
+    def on_search_emoji_store(self, text: str):
+        self.view.component_emoji_store.set_filter(api_emoji_store.search(text) if text.strip() else None)
+
+    def on_click_emoji_store(self, event, text: str):
         self.clipboard.setText(text)
 
         try:
@@ -195,6 +266,9 @@ class _ControllerEmojiHistory:
             self.view.show_toast_message(title='Error', message=str(error), duration=4000)
 
 
+_CAROUSEL_FILL_BATCH: int = 64
+
+
 class _ControllerCarouselOfImages:
     """
         TODO:
@@ -206,32 +280,85 @@ class _ControllerCarouselOfImages:
         self.model = model
         self.component_art_board = self.view.component_art_board
         self.component_carousel_of_images = self.view.component_carousel_of_images
-        self.api_draw_table = ApiDrawTable(font=('seguiemj.ttf', 24), bg='black')
+        self.api_draw_table = ApiDrawTable(font=SETTINGS_DRAW_TABLE['font'], bg=SETTINGS_DRAW_TABLE['bg'])
+
+        # Thumbnails are rendered in one worker thread (ApiDrawTable caches are not thread safe)
+        self._thread_pool = QThreadPool()
+        self._thread_pool.setMaxThreadCount(1)
+        self._render_ticket: int = 0
+        self._render_jobs: dict[int, tuple[UtilWorker, QWidget]] = dict()
+        # Newest render of each item, an item rendered again (undo / redo of its frame) keeps the newest thumbnail
+        self._render_latest: dict[QWidget, int] = dict()
+        # Frames [start, end) of an opened project still to be added to the carousel
+        self._carousel_fill: tuple[int, int] = (0, 0)
 
     def on_press_shortcut_add_carousel_item(self):
+        self._finish_carousel_fill()
+
         # Clear current art board
         self.component_art_board.clear_cells_text()
 
         # Add carousel item
-        image = self.api_draw_table.draw_table(cells=self.model.art_board.art.cells_array1d())
-        self.component_carousel_of_images.add_carousel_item_pixmap(self._pillow_image_to_pixmap(image))
-        self.component_carousel_of_images.update_items_title()
+        self._add_carousel_item(snapshot=self.model.art_board.snapshot(self.model.art_board.index))
 
         # Create new model-art_board
         self.model.art_board.add_art(*self.component_art_board.table_size())
         self.model.art_board.index = self.model.art_board.count() - 1
+        self.schedule_autosave()
+
+    def _add_carousel_item(self, snapshot, update_titles: bool = True):
+        """ Show a placeholder item at once, the thumbnail of a table snapshot is rendered in background """
+        item = self.component_carousel_of_images.add_carousel_item_pixmap(util_convert_text_to_pixmap('...'))
+        if update_titles:
+            self.component_carousel_of_images.update_items_title()
+        self._render_carousel_item(item, snapshot)
+
+    def _render_carousel_item(self, item, snapshot):
+        """ Render the thumbnail of a table snapshot in background and show it in a carousel item """
+        self._render_ticket += 1
+        worker = UtilWorker(self._render_thumbnail, snapshot)
+        worker.setAutoDelete(False)
+        worker.signals.finished.connect(
+            lambda image, ticket=self._render_ticket: self._on_thumbnail_rendered(ticket, image),
+            Qt.ConnectionType.QueuedConnection
+        )
+        worker.signals.failed.connect(
+            lambda error, ticket=self._render_ticket: self._on_thumbnail_failed(ticket, error),
+            Qt.ConnectionType.QueuedConnection
+        )
+        self._render_jobs[self._render_ticket] = (worker, item)
+        self._render_latest[item] = self._render_ticket
+        self._thread_pool.start(worker)
+
+    def _render_thumbnail(self, snapshot) -> QImage:
+        # Worker thread: QPixmap is not allowed here, only QImage
+        return self._pillow_image_to_qimage(self.api_draw_table.draw_table_changes(table=snapshot))
+
+    def _on_thumbnail_rendered(self, ticket: int, image: QImage):
+        # Jobs may complete in any order, the ticket keeps the link to the carousel item
+        worker, item = self._render_jobs.pop(ticket)
+        if self._render_latest.get(item) != ticket:
+            return
+        del self._render_latest[item]
+        self.component_carousel_of_images.update_carousel_item_pixmap(item, QPixmap.fromImage(image))
+
+    def _on_thumbnail_failed(self, ticket: int, error: str):
+        worker, item = self._render_jobs.pop(ticket)
+        if self._render_latest.get(item) == ticket:
+            del self._render_latest[item]
+        self.view.show_toast_message(title='Error', message=f'Thumbnail render failed: {error}', duration=4000)
 
     @staticmethod
-    def _pillow_image_to_pixmap(image) -> QPixmap:
+    def _pillow_image_to_qimage(image) -> QImage:
         image_data = image.tobytes("raw", "RGB")
         image_size = image.size
-        return QPixmap.fromImage(
-            QImage(
-                image_data, image_size[0], image_size[1], QImage.Format.Format_RGB888
-            )
-        )
+        return QImage(
+            image_data, image_size[0], image_size[1], image_size[0] * 3, QImage.Format.Format_RGB888
+        ).copy()
 
     def on_click_del_carousel_item(self, event, item):
+        self._finish_carousel_fill()
+
         # Get carousel item id on click
         item_id: int = self.component_carousel_of_images.get_item_id(item)
 
@@ -242,6 +369,7 @@ class _ControllerCarouselOfImages:
         # Delete model-art_board
         self.model.art_board.delete_art(item_id)
         self.model.art_board.index = self.model.art_board.count() - 1
+        self.schedule_autosave()
 
     def on_click_img_carousel_item(self, event, item):
         """
@@ -250,6 +378,7 @@ class _ControllerCarouselOfImages:
                 - add edit mode for current art on click
                 - add menu (1 - copy art; 2 - delete art; 3 - edit art)
         """
+        self._finish_carousel_fill()
 
         # Get carousel item id on click
         item_id: int = self.component_carousel_of_images.get_item_id(item)
@@ -262,17 +391,47 @@ class _ControllerCarouselOfImages:
         self.component_carousel_of_images.del_carousel_item(item_id)
         self.component_carousel_of_images.update_items_title()
 
-        # Delete model-art_board
-        cells: list = self.model.art_board.arts[item_id].cells_array1d()
-        self.model.art_board.delete_art(item_id)
-
-        # Change current model-art_board
+        # Replace current model-art_board with the selected one
+        self.model.art_board.delete_art(self.model.art_board.count() - 1)
+        self.model.art_board.insert_art(self.model.art_board.arts[item_id], item_id, self.model.art_board.count() - 1)
         self.model.art_board.index = self.model.art_board.count() - 1
-        self.model.art_board.art.change_cells(cells)
+        cells: list = self.model.art_board.art.cells_array1d()
 
         # Change cells in art board
         self.component_art_board.clear_cells_text()
         self.component_art_board.set_cells_text(cells)
+        self.schedule_autosave()
+
+    def show_art_board_frames(self):
+        """ Rebuild the carousel and the art board from the model, after the model art board was replaced """
+        for index in reversed(range(self.component_carousel_of_images.items_count())):
+            self.component_carousel_of_images.del_carousel_item(index)
+
+        # Every frame but the last one (the frame being edited) is shown in the carousel,
+        # items are added in batches between events so a long project is usable at once
+        self._carousel_fill = (0, self.model.art_board.count() - 1)
+        self._fill_carousel()
+
+        self.component_art_board.resize_table(*self.model.size_art)
+        self.component_art_board.update_size(size=self.model.resize.size)
+        self.component_art_board.clear_cells_text()
+        self.component_art_board.set_cells_text(self.model.art_board.art.cells_array1d())
+
+    def _fill_carousel(self, limit: int = _CAROUSEL_FILL_BATCH):
+        start, end = self._carousel_fill
+        stop: int = min(start + limit, end)
+        for index in range(start, stop):
+            self._add_carousel_item(snapshot=self.model.art_board.snapshot(index), update_titles=False)
+
+        self._carousel_fill = (stop, end)
+        if stop < end:
+            QTimer.singleShot(0, self._fill_carousel)
+
+    def _finish_carousel_fill(self):
+        """ Add the items still waiting, before the carousel indexes are used """
+        start, end = self._carousel_fill
+        if start < end:
+            self._fill_carousel(limit=end - start)
 
     def _copy_image_carousel_item(self, item_id: int):
         """
@@ -282,14 +441,268 @@ class _ControllerCarouselOfImages:
                 - replace this method to menu
         """
 
-        cells: list = self.model.art_board.arts[item_id].cells_array1d()
-        image = self.api_draw_table.draw_table(cells=cells)
-        self.component_carousel_of_images.add_carousel_item_pixmap(self._pillow_image_to_pixmap(image))
-        self.component_carousel_of_images.update_items_title()
+        self._add_carousel_item(snapshot=self.model.art_board.snapshot(item_id))
 
-        self.model.art_board.arts[self.model.art_board.index].change_cells(cells)
-        self.model.art_board.add_art(*self.component_art_board.table_size())
+        # Duplicate model-art_board before the current one (copy-on-write, no cell is copied)
+        self.model.art_board.copy_art(item_id, self.model.art_board.count() - 1)
         self.model.art_board.index = self.model.art_board.count() - 1
+        self.schedule_autosave()
+
+
+# Palette codes of the frames written to project files (uint16, see ModelArt)
+_CODE_TYPE: str = 'H'
+
+
+class _SavedProject(NamedTuple):
+    """
+        Project file after the last save: frame versions written, file size and end of the full part,
+        palette of the file and the file code of every art board palette code written so far
+    """
+    filepath: str
+    size: int
+    base_size: int
+    versions: list[int]
+    values: tuple[str | None, ...]
+    codes: dict[int, int]
+
+
+class _FileFrame(NamedTuple):
+    """ Frame with its codes translated to the palette of a project file """
+    columns: int
+    rows: int
+    codes: array
+
+
+def _file_palette(
+        frames: list,
+        values: tuple[str | None, ...],
+        file_values: tuple[str | None, ...],
+        codes: dict[int, int]
+) -> tuple[tuple[str | None, ...], dict[int, int], list]:
+    """
+        Add the values used by frames to the palette of a file: values (art board palette) no frame uses are
+        left out, codes maps an art board code to its file code. Returns the new palette and codes of the file
+        and the frames in file codes, a frame is copied only if one of its codes moved.
+    """
+    file_values, codes = list(file_values), dict(codes)
+    used: list[set[int]] = [set(frame.codes) for frame in frames]
+    # In art board order, a palette without unused values keeps its codes
+    for code in sorted(set().union(*used)):
+        if code not in codes:
+            codes[code] = len(file_values)
+            file_values.append(values[code])
+
+    return tuple(file_values), codes, [
+        frame if all(codes[code] == code for code in frame_codes)
+        else _FileFrame(frame.columns, frame.rows, array(_CODE_TYPE, map(codes.__getitem__, frame.codes)))
+        for frame, frame_codes in zip(frames, used)
+    ]
+
+
+def _write_project(filepath: str, frames: list, values: tuple[str | None, ...]) -> tuple:
+    """
+        Full write of frame snapshots to filepath (.emart or JSON), safe to run in a worker thread.
+        Only the palette values the frames use are written, returns (size, base size, file palette, file codes).
+    """
+    if not filepath.endswith('.emart') and SETTINGS_EXPORT_FRAMES_VERSION == 1:
+        # No palette in the file, cells are written as values
+        api_export_frames(filepath=filepath, frames=frames, indent=SETTINGS_EXPORT_FRAMES_INDENT, version=1)
+        return 0, 0, values, {code: code for code in range(len(values))}
+
+    file_values, codes, frames = _file_palette(frames, values, (None,), {0: 0})
+    if not filepath.endswith('.emart'):
+        api_export_frames(
+            filepath=filepath,
+            frames=frames,
+            indent=SETTINGS_EXPORT_FRAMES_INDENT,
+            version=SETTINGS_EXPORT_FRAMES_VERSION,
+            values=file_values
+        )
+        return 0, 0, file_values, codes
+
+    size: int = api_write_emart(filepath=filepath, frames=frames, values=file_values)
+    return size, size, file_values, codes
+
+
+def _append_project(
+        filepath: str,
+        size: int,
+        base_size: int,
+        count: int,
+        frames: dict,
+        values: tuple[str | None, ...],
+        file_values: tuple[str | None, ...],
+        codes: dict[int, int]
+) -> tuple:
+    """
+        Incremental write: only the changed frames and the palette values the file lacks are appended
+        to the .emart log, returns (size, base size, file palette, file codes)
+    """
+    new_values, codes, file_frames = _file_palette(list(frames.values()), values, file_values, codes)
+    size = api_append_emart(filepath, size, count, dict(zip(frames, file_frames)), new_values, len(file_values))
+    return size, base_size, new_values, codes
+
+
+class _ControllerAutosave:
+    """
+        Saves the opened project after SETTINGS_AUTOSAVE['idle'] ms without edits.
+        Frames are snapshotted in the GUI thread and written in a worker, at most one write is in flight:
+        edits made meanwhile are saved by one more write when it is done.
+
+        An .emart project is saved incrementally, frames changed since the last save are appended to the file.
+        When the appended part outgrows SETTINGS_PROJECT_LOG the file is rewritten (compacted) in background.
+    """
+    def __init__(self, view: ViewWorkspace, model: ModelArt):
+        self.view = view
+        self.model = model
+
+        self._autosave_timer = QTimer()
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.setInterval(SETTINGS_AUTOSAVE['idle'])
+        self._autosave_timer.timeout.connect(self._start_autosave)
+        self._autosave_job: UtilWorker | None = None
+        self._autosave_pending: bool = False
+
+        self._saved: _SavedProject | None = None
+        # (filepath, frame versions) of the write in progress
+        self._saving: tuple[str, list[int]] | None = None
+
+    def schedule_autosave(self):
+        """ Called after every edit of the model, restarts the idle timer """
+        if SETTINGS_AUTOSAVE['enabled']:
+            self._autosave_timer.start()
+
+    def is_saving(self) -> bool:
+        """ A background write is in flight, its result is applied to the opened project when it is done """
+        return self._autosave_job is not None
+
+    def mark_saved(self, filepath: str, size: int, base_size: int):
+        """
+            The art board was just read from filepath, the next save appends only what changes after it.
+            Not to be called while is_saving(): the running write would record the previous project as saved.
+        """
+        if self.is_saving():
+            raise RuntimeError('mark_saved while a background write is running')
+        self._autosave_timer.stop()
+        self._autosave_pending = False
+        self._saving = None
+        # The palette of an opened file is the palette of the art board
+        values: tuple[str | None, ...] = self.model.art_board.palette.values()
+        self._saved = _SavedProject(
+            filepath, size, base_size, self._frame_versions(), values, {code: code for code in range(len(values))}
+        )
+
+    def save_project(self, filepath: str) -> bool:
+        """ Save in the GUI thread, False if a background write is running (the save follows it) """
+        self._autosave_timer.stop()
+        if self._autosave_job is not None:
+            self._autosave_pending = True
+            return False
+
+        job: tuple | None = self.save_job(filepath)
+        if job is not None:
+            try:
+                self._on_saved(job[0](*job[1:]))
+            finally:
+                self._saving = None
+
+        if self._needs_compaction():
+            self._start_background_save(compact=True)
+        return True
+
+    def save_job(self, filepath: str, compact: bool = False) -> tuple | None:
+        """ Write function and its arguments taken in the GUI thread (None if nothing changed since the last save) """
+        art_board = self.model.art_board
+        versions: list[int] = self._frame_versions()
+        values: tuple[str | None, ...] = art_board.palette.values()
+        saved: _SavedProject | None = self._saved
+
+        if not compact and self._can_append(filepath):
+            changed: dict = {
+                index: art_board.snapshot(index) for index, version in enumerate(versions)
+                if index >= len(saved.versions) or saved.versions[index] != version
+            }
+            if not changed and len(versions) == len(saved.versions):
+                return None
+
+            self._saving = (filepath, versions)
+            return (
+                _append_project, filepath, saved.size, saved.base_size, len(versions), changed, values,
+                saved.values, saved.codes
+            )
+
+        if os.name == 'nt' and filepath == self.model.filepath:
+            # The opened project is memory-mapped, Windows can't replace a mapped file
+            art_board.release_source()
+        self._saving = (filepath, versions)
+        return _write_project, filepath, art_board.snapshots(), values
+
+    def _frame_versions(self) -> list[int]:
+        art_board = self.model.art_board
+        return [art_board.frame_version(index) for index in range(art_board.count())]
+
+    def _can_append(self, filepath: str) -> bool:
+        saved: _SavedProject | None = self._saved
+        return (
+            filepath.endswith('.emart')
+            and saved is not None
+            and saved.filepath == filepath
+            # Anything else wrote the file meanwhile (or the last append was cut), it is rewritten
+            and os.path.isfile(filepath)
+            and os.path.getsize(filepath) == saved.size
+        )
+
+    def _needs_compaction(self) -> bool:
+        saved: _SavedProject | None = self._saved
+        if saved is None or not saved.filepath.endswith('.emart'):
+            return False
+        limit: float = max(SETTINGS_PROJECT_LOG['compact_min'], SETTINGS_PROJECT_LOG['compact_ratio'] * saved.base_size)
+        return saved.size - saved.base_size > limit
+
+    def _on_saved(self, result: tuple):
+        filepath, versions = self._saving
+        size, base_size, values, codes = result
+        self._saved = _SavedProject(filepath, size, base_size, versions, values, codes)
+
+    def _start_autosave(self):
+        self._start_background_save()
+
+    def _start_background_save(self, compact: bool = False):
+        if not self.model.is_valid_filepath():
+            return
+        if self._autosave_job is not None:
+            self._autosave_pending = True
+            return
+
+        self._autosave_pending = False
+        try:
+            job: tuple | None = self.save_job(self.model.filepath, compact=compact or self._needs_compaction())
+        except OSError as error:
+            # The mapped project file could not be released, the next idle period tries again
+            self.view.show_toast_message(title='Error', message=f'Autosave failed: {error}', duration=5000)
+            self.schedule_autosave()
+            return
+        if job is None:
+            return
+
+        self._autosave_job = UtilWorker(*job)
+        self._autosave_job.setAutoDelete(False)
+        self._autosave_job.signals.finished.connect(self._on_autosave_finished, Qt.ConnectionType.QueuedConnection)
+        self._autosave_job.signals.failed.connect(self._on_autosave_failed, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(self._autosave_job)
+
+    def _on_autosave_finished(self, result: tuple):
+        self._autosave_job = None
+        self._on_saved(result)
+        self._saving = None
+        if self._autosave_pending or self._needs_compaction():
+            self._start_background_save()
+
+    def _on_autosave_failed(self, error: str):
+        self._autosave_job = None
+        self._autosave_pending = False
+        self._saving = None
+        self.view.show_toast_message(title='Error', message=f'Autosave failed: {error}', duration=5000)
 
 
 class ControllerWorkspace(
@@ -297,7 +710,8 @@ class ControllerWorkspace(
     _ControllerArtBoard,
     _ControllerEmojiStore,
     _ControllerEmojiHistory,
-    _ControllerCarouselOfImages
+    _ControllerCarouselOfImages,
+    _ControllerAutosave
 ):
     """ Controller for 'ViewWorkspace' """
 
@@ -325,36 +739,154 @@ class ControllerWorkspace(
         # [ carousel-of-images ]
         _ControllerCarouselOfImages.__init__(self, view=view, model=model)
 
+        # [ autosave ]
+        _ControllerAutosave.__init__(self, view=view, model=model)
+
         # [ shortcuts ]
         _shortcuts: tuple = (
             QShortcut(QKeySequence(SETTINGS_SHORTCUTS['ClearCurrentArtBoard']['shortcut']), self.view),
             QShortcut(QKeySequence(SETTINGS_SHORTCUTS['AddCarouselItem']['shortcut']), self.view),
-            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['SaveFrames']['shortcut']), self.view)
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['SaveFrames']['shortcut']), self.view),
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['Undo']['shortcut']), self.view),
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['Redo']['shortcut']), self.view),
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['ExportImages']['shortcut']), self.view),
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['ExportAnimation']['shortcut']), self.view),
+            QShortcut(QKeySequence(SETTINGS_SHORTCUTS['OpenProject']['shortcut']), self.view)
         )
 
         _shortcuts[0].activated.connect(self.on_press_shortcut_clear_current_art_board)
         _shortcuts[1].activated.connect(self.on_press_shortcut_add_carousel_item)
         _shortcuts[2].activated.connect(self._on_press_shortcut_save_frames)
+        _shortcuts[3].activated.connect(self.on_press_shortcut_undo)
+        _shortcuts[4].activated.connect(self.on_press_shortcut_redo)
+        _shortcuts[5].activated.connect(self._on_press_shortcut_export_images)
+        _shortcuts[6].activated.connect(self._on_press_shortcut_export_animation)
+        _shortcuts[7].activated.connect(self._on_press_shortcut_open_project)
+
+        self._export_job: UtilWorker | None = None
 
     def _on_press_shortcut_save_frames(self):
         if self.model.is_valid_filepath():
-            api_export_frames(filepath=self.model.filepath, frames=self.model.art_board.arts)
-            self.view.show_toast_message(title='Complete', message='Complete file save', duration=2000)
+            try:
+                saved: bool = self.save_project(self.model.filepath)
+            except OSError as error:
+                self.view.show_toast_message(title='Error', message=f'File save failed: {error}', duration=5000)
+                return
+            if saved:
+                self.view.show_toast_message(title='Complete', message='Complete file save', duration=2000)
+            else:
+                self.view.show_toast_message(title='Save', message='File save follows the running one', duration=2000)
             return
 
         file: str = QFileDialog().getSaveFileName(
             self.view,
             "Save file",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            "Emoji Art Files (*.emart);;JSON Files (*.json);;Compressed JSON Files (*.json.gz);;All Files (*)"
         )[0]
 
         try:
-            api_export_frames(filepath=file, frames=self.model.art_board.arts)
+            self.save_project(file)
             self.model.filepath = file
             self.view.show_toast_message(title='Complete', message='Complete file save', duration=2000)
         except FileNotFoundError as error:
             self.view.show_toast_message(title='Error', message='File not found: ' + str(error), duration=5000)
+        except OSError as error:
+            self.view.show_toast_message(title='Error', message=f'File save failed: {error}', duration=5000)
+
+    def _on_press_shortcut_open_project(self):
+        file: str = QFileDialog().getOpenFileName(
+            self.view,
+            "Open file",
+            "",
+            "Emoji Art Files (*.emart);;JSON Files (*.json *.json.gz)"
+        )[0]
+        if not file:
+            return
+        if self.is_saving():
+            # The result of the running write belongs to the current project (checked after the dialog,
+            # autosave may start while it is open)
+            self.view.show_toast_message(title='Open', message='Wait for the running save to finish', duration=3000)
+            return
+
+        try:
+            self.model.open_project(file)
+        except (OSError, ValueError) as error:
+            self.view.show_toast_message(title='Error', message=f'Open failed: {error}', duration=5000)
+            return
+
+        source = self.model.art_board.source
+        if source is None:
+            self.mark_saved(file, 0, 0)
+        else:
+            self.mark_saved(file, source.size, source.size - source.log_size)
+        self.show_art_board_frames()
+        self.view.show_toast_message(title='Complete', message='Complete file open', duration=2000)
+
+    def _on_press_shortcut_export_images(self):
+        if self._export_job is not None:
+            self.view.show_toast_message(title='Error', message='Export is already running', duration=2000)
+            return
+
+        directory: str = QFileDialog().getExistingDirectory(self.view, "Export frames as images", "")
+        if not directory:
+            return
+
+        self._export_job = UtilWorker(
+            api_export_images,
+            directory,
+            self.model.art_board.snapshots(),
+            self.model.art_board.palette.values(),
+            SETTINGS_DRAW_TABLE['font'],
+            SETTINGS_DRAW_TABLE['bg']
+        )
+        self._export_job.setAutoDelete(False)
+        self._export_job.signals.finished.connect(self._on_export_images_finished, Qt.ConnectionType.QueuedConnection)
+        self._export_job.signals.failed.connect(self._on_export_images_failed, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(self._export_job)
+        self.view.show_toast_message(title='Export', message='Export of frames started', duration=2000)
+
+    def _on_press_shortcut_export_animation(self):
+        if self._export_job is not None:
+            self.view.show_toast_message(title='Error', message='Export is already running', duration=2000)
+            return
+
+        file: str = QFileDialog().getSaveFileName(
+            self.view,
+            "Export animation",
+            "",
+            "GIF Files (*.gif);;APNG Files (*.png);;WebP Files (*.webp)"
+        )[0]
+        if not file:
+            return
+
+        self._export_job = UtilWorker(
+            api_export_animation,
+            file,
+            self.model.art_board.snapshots(),
+            self.model.art_board.palette.values(),
+            SETTINGS_DRAW_TABLE['font'],
+            SETTINGS_DRAW_TABLE['bg'],
+            SETTINGS_EXPORT_ANIMATION['duration'],
+            SETTINGS_EXPORT_ANIMATION['loop']
+        )
+        self._export_job.setAutoDelete(False)
+        self._export_job.signals.finished.connect(self._on_export_animation_finished, Qt.ConnectionType.QueuedConnection)
+        self._export_job.signals.failed.connect(self._on_export_images_failed, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(self._export_job)
+        self.view.show_toast_message(title='Export', message='Export of animation started', duration=2000)
+
+    def _on_export_animation_finished(self, count: int):
+        self._export_job = None
+        self.view.show_toast_message(title='Complete', message=f'Exported animation of {count} frames', duration=2000)
+
+    def _on_export_images_finished(self, files: list[str]):
+        self._export_job = None
+        self.view.show_toast_message(title='Complete', message=f'Exported {len(files)} images', duration=2000)
+
+    def _on_export_images_failed(self, error: str):
+        self._export_job = None
+        self.view.show_toast_message(title='Error', message=f'Export failed: {error}', duration=5000)
 
     def on_click_shortcuts_item(self, event, item: QPushButton):
         self.view.show_messagebox(title=item.text(), message=SETTINGS_SHORTCUTS_HTML[item.toolTip()], status='i')
@@ -1,47 +1,181 @@
 import os
-from typing import List
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Iterable, MutableSequence, Sequence
+from functools import lru_cache
+from typing import List, NamedTuple
 
 import emoji
 from util import UtilMetaSingleton
-from emoji import is_emoji
+from settings import SETTINGS_ART_BOARD_STORAGE, SETTINGS_ART_BOARD_JOURNAL_BUDGET
+from plugins.api_emoji_validator.api_emoji_validator import api_is_emoji
+from plugins.api_emart.api_emart import ApiEmartReader
+from plugins.api_import_frames.api_import_frames import api_import_frames
+
+
+_CODE_TYPE: str = 'H'
+_CODE_MAX: int = 0xFFFF
+_KEYFRAME_DELTA_RATIO: float = 0.25
+_JOURNAL_ENTRY_OVERHEAD: int = 256
+_STAMP_TYPE: str = 'I'
+_PROJECT_EXTENSIONS: tuple[str, ...] = ('.json', '.json.gz', '.emart')
+
+
+@lru_cache(maxsize=8)
+def _empty_codes(size: int) -> array:
+    """ Shared read-only grid of empty cells, used for clearing and comparison """
+    return array(_CODE_TYPE, bytes(array(_CODE_TYPE).itemsize * size))
+
+
+def _insert_position(index: int, length: int) -> int:
+    """ Position list.insert(index, ...) puts an item at in a sequence of length items """
+    return min(max(index if index >= 0 else length + index, 0), length)
+
+
+class _Clock:
+    """ Monotonic version counter shared by every table, each write gets a new version """
+
+    def __init__(self):
+        self._now: int = 0
+
+    @property
+    def now(self) -> int:
+        return self._now
+
+    def tick(self) -> int:
+        self._now += 1
+        return self._now
+
+
+_CLOCK = _Clock()
+
+
+class _Palette:
+    """
+        Interned emoji strings shared by all frames of an art board.
+
+        Every string gets a small integer code the first time it enters the palette,
+        it is validated only at that moment. Codes are never reused, so they stay stable
+        for the lifetime of the palette and can be used as cache keys. Values no frame uses any more stay
+        in the palette, they are left out when a project file is written.
+        Code 0 is reserved for an empty cell.
+    """
+
+    EMPTY: int = 0
+
+    def __init__(self):
+        self._values: list[str | None] = [None]
+        self._codes: dict[str, int] = dict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._codes
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return self.EMPTY
+
+        code: int | None = self._codes.get(value)
+        if code is None:
+            self._validate_value(value)
+            self._validate_palette_size()
+            code = len(self._values)
+            self._values.append(value)
+            self._codes[value] = code
+        return code
+
+    def value(self, code: int) -> str | None:
+        return self._values[code]
+
+    def values(self) -> tuple[str | None, ...]:
+        return tuple(self._values)
+
+    def texts(self, replace_none: str) -> list[str]:
+        return [replace_none, *self._values[1:]]
+
+    @staticmethod
+    def _validate_value(value: str):
+        if not isinstance(value, str):
+            raise ValueError(f'Invalid value: {value} (not type "str" or not type "None")')
+        if not api_is_emoji(value):
+            raise ValueError(f"Invalid cell value: {value} (not an emoji)")
+
+    def _validate_palette_size(self):
+        if len(self._values) > _CODE_MAX:
+            raise OverflowError(f'Palette overflow: {len(self._values)} (max {_CODE_MAX})')
 
 
 class _Cell:
-    def __init__(self, column: int, row: int, value: str | None):
-        self._column: int = column
-        self._row: int = row
-        self._value: str | None = value
+    """ Lightweight view of one cell inside the packed grid of a _Table """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: '_Table', index: int):
+        self._table: _Table = table
+        self._index: int = index
 
     @property
     def row(self) -> int:
-        return self._row
+        return self._index % self._table.rows
 
     @property
     def column(self) -> int:
-        return self._column
+        return self._index // self._table.rows
+
+    @property
+    def code(self) -> int:
+        return self._table.codes[self._index]
 
     @property
     def value(self) -> str | None:
-        return self._value
+        return self._table.palette.value(self._table.codes[self._index])
 
     @value.setter
     def value(self, string: str | None):
-        if isinstance(string, str) or string is None:
-            self._value = string
-        else:
-            raise ValueError(f'Invalid value: {string} (not type "str" or not type "None")')
+        self._table.put(self._index, self._table.palette.intern(string))
 
     def is_empty(self) -> bool:
-        return bool(self._value is None)
+        return bool(self._table.codes[self._index] == _Palette.EMPTY)
 
 
 class _Table:
-    def __init__(self, columns: int, rows: int):
+    """
+        Cells are packed column by column into one array of palette codes:
+        cell (column, row) -> codes[column * rows + row]
+    """
+
+    def __init__(self, columns: int, rows: int, palette: _Palette | None = None):
         self._columns: int = columns
         self._rows: int = rows
-        self._cells: list[list[_Cell]] = [
-            [_Cell(column, row, value=None) for row in range(rows)] for column in range(columns)
-        ]
+        self._palette: _Palette = _Palette() if palette is None else palette
+        self._codes: array = array(_CODE_TYPE, _empty_codes(columns * rows))
+        self._version: int = _CLOCK.tick()
+        self._base_version: int = self._version
+        # Every cell counts as changed for versions before _full_version, _stamps tells the cells written after it
+        self._full_version: int = self._version
+        self._stamps: array | None = None
+        self._shared: bool = False
+        self._rows_text: list[str | None] = [None] * rows
+        self._rows_text_none: str | None = None
+
+    @classmethod
+    def from_codes(cls, columns: int, rows: int, palette: _Palette, codes: array) -> '_Table':
+        table = cls(columns=columns, rows=rows, palette=palette)
+        table._codes[:] = codes
+        return table
+
+    def clone(self) -> '_Table':
+        """ Copy-on-write duplicate: both tables share the codes buffer until one of them is changed """
+        table = _Table.__new__(_Table)
+        table._columns, table._rows, table._palette = self._columns, self._rows, self._palette
+        table._codes = self._codes
+        table._version = table._base_version = table._full_version = _CLOCK.tick()
+        table._stamps, table._shared = None, True
+        table._rows_text, table._rows_text_none = self._rows_text.copy(), self._rows_text_none
+        self._shared = True
+        return table
 
     @property
     def columns(self) -> int:
@@ -51,63 +185,553 @@ class _Table:
     def rows(self) -> int:
         return self._rows
 
+    @property
+    def palette(self) -> _Palette:
+        return self._palette
+
+    @property
+    def codes(self) -> array:
+        """ Read-only view of the packed grid, writes must go through put() """
+        return self._codes
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def key(self) -> int:
+        """ Unique id of the table content lineage, shared with its snapshots """
+        return self._base_version
+
+    def changed_since(self, version: int) -> array:
+        """ Indexes of the cells written after version (every cell if the table is newer than version) """
+        return _changed_since(self._stamps, self._full_version, self._version, len(self._codes), version)
+
+    def snapshot(self) -> '_TableSnapshot':
+        """ Immutable copy for other threads: the codes buffer is shared and copied by the next write """
+        self._shared = True
+        return _TableSnapshot(
+            columns=self._columns,
+            rows=self._rows,
+            key=self._base_version,
+            version=self._version,
+            full_version=self._full_version,
+            codes=self._codes,
+            stamps=None if self._stamps is None else array(_STAMP_TYPE, self._stamps),
+            values=self._palette.values()
+        )
+
     def get_cells(self, only_value: bool = False) -> list[list[str | None]] | list[list[_Cell]]:
         if only_value:
+            values: tuple[str | None, ...] = self._palette.values()
             return [
-                [self._cells[column][row].value for row in range(self._rows)] for column in range(self._columns)
+                [values[code] for code in self._codes[column * self._rows:(column + 1) * self._rows]]
+                for column in range(self._columns)
             ]
 
-        return self._cells
+        return [
+            [_Cell(self, column * self._rows + row) for row in range(self._rows)] for column in range(self._columns)
+        ]
 
     def cell(self, column: int, row: int) -> _Cell | None:
         self._validate_cell_index(column, row)
-        return self._cells[column][row]
+        return _Cell(self, self._index(column, row))
 
     def clear_cell(self, column: int, row: int):
         self._validate_cell_index(column, row)
-        self._cells[column][row].value = None
+        self.put(self._index(column, row), _Palette.EMPTY)
 
     def clear_cells(self) -> None:
-        for column in range(self._columns):
-            for row in range(self._rows):
-                self.clear_cell(column, row)
+        self._codes, self._shared = array(_CODE_TYPE, _empty_codes(len(self._codes))), False
+        self._rows_text = [None] * self._rows
+        self._version = self._full_version = _CLOCK.tick()
+        self._stamps = None
 
     def is_empty_cells(self) -> bool:
-        for column in range(self._columns):
-            for row in range(self._rows):
-                if not self._cells[column][row].is_empty():
-                    return False
-        return True
+        return self._codes.count(_Palette.EMPTY) == len(self._codes)
 
     def change_cell(self, column: int, row: int, value: str | None) -> None:
         self._validate_cell_index(column, row)
-        self._validate_cell_value(value)
-        self._cells[column][row].value = value
+        self.put(self._index(column, row), self._palette.intern(value))
 
     def change_cells(self, cells: list[_Cell]) -> None:
         for cell in cells:
             self.change_cell(column=cell.column, row=cell.row, value=cell.value)
 
+    def put(self, index: int, code: int) -> None:
+        old_code: int = self._codes[index]
+        if old_code == code:
+            return
+        if self._shared:
+            self._codes, self._shared = array(_CODE_TYPE, self._codes), False
+
+        self._codes[index] = code
+        self._rows_text[index % self._rows] = None
+        self._version = _CLOCK.tick()
+        self._stamp()[index] = self._version
+
+    def put_codes(self, indexes: array, codes: array) -> array:
+        """ Bulk write in a single call, returns the codes that were replaced """
+        if self._shared:
+            self._codes, self._shared = array(_CODE_TYPE, self._codes), False
+
+        old_codes: array = array(_CODE_TYPE, [self._codes[index] for index in indexes])
+        self._version = _CLOCK.tick()
+        stamps: array = self._stamp()
+        for index, code in zip(indexes, codes):
+            self._codes[index] = code
+            self._rows_text[index % self._rows] = None
+            stamps[index] = self._version
+        return old_codes
+
     def cells_array1d(self) -> list[_Cell]:
-        return [cell for cells in self._cells for cell in cells]
+        return [_Cell(self, index) for index in range(len(self._codes))]
+
+    def cells(self, indexes: Iterable[int]) -> list[_Cell]:
+        return [_Cell(self, index) for index in indexes]
+
+    def cell_index(self, column: int, row: int) -> int:
+        self._validate_cell_index(column, row)
+        return self._index(column, row)
 
     def convert_to_text(self, replace_none: str = ''):
-        text: str = ''
-        for column in range(self._columns):
-            for row in range(self._rows):
-                value: str = self._cells[row][column].value
-                text += replace_none if value is None else value
-            text += '\n'
-        return text
+        """ One line per row, only the rows changed since the previous call are joined again """
+        if replace_none != self._rows_text_none:
+            self._rows_text, self._rows_text_none = [None] * self._rows, replace_none
+
+        texts: list[str] | None = None
+        for row, text in enumerate(self._rows_text):
+            if text is not None:
+                continue
+            if texts is None:
+                texts = self._palette.texts(replace_none)
+            self._rows_text[row] = ''.join([texts[code] for code in self._codes[row::self._rows]])
+
+        return '\n'.join(self._rows_text) + '\n'
+
+    def _index(self, column: int, row: int) -> int:
+        return column * self._rows + row
+
+    def drop_stamps(self) -> None:
+        """ Free the dirty map (the table is no longer edited), readers of an older version see every cell changed """
+        if self._stamps is not None:
+            self._stamps, self._full_version = None, self._version
+
+    def _stamp(self) -> array:
+        """ Dirty map: version of the last write of every cell, allocated on the first write """
+        if self._stamps is None:
+            self._stamps = array(_STAMP_TYPE, [self._full_version]) * len(self._codes)
+        return self._stamps
 
     def _validate_cell_index(self, column: int, row: int):
         if column >= self._columns or row >= self._rows:
             raise ValueError(f"Invalid cell index: ({column}, {row})")
 
-    @staticmethod
-    def _validate_cell_value(value: str | None):
-        if not is_emoji(value) and value is not None:
-            raise ValueError(f"Invalid cell value: {value} (not an emoji)")
+
+def _changed_since(stamps: array | None, full_version: int, last_version: int, size: int, version: int) -> array:
+    if version < full_version:
+        return array('I', range(size))
+    if stamps is None or version >= last_version:
+        return array('I')
+    return array('I', [index for index, stamp in enumerate(stamps) if stamp > version])
+
+
+class _SnapshotCell(NamedTuple):
+    column: int
+    row: int
+    value: str | None
+
+
+class _TableSnapshot:
+    """ Read-only frame taken by _Table.snapshot(), safe to read from a worker thread """
+
+    __slots__ = ('columns', 'rows', 'key', 'version', '_full_version', '_codes', '_stamps', '_values')
+
+    def __init__(
+            self,
+            columns: int,
+            rows: int,
+            key: int,
+            version: int,
+            full_version: int,
+            codes: array,
+            stamps: array | None,
+            values: tuple[str | None, ...]
+    ):
+        self.columns: int = columns
+        self.rows: int = rows
+        self.key: int = key
+        self.version: int = version
+        self._full_version: int = full_version
+        self._codes: array = codes
+        self._stamps: array | None = stamps
+        self._values: tuple[str | None, ...] = values
+
+    @property
+    def codes(self) -> array:
+        return self._codes
+
+    @property
+    def values(self) -> tuple[str | None, ...]:
+        return self._values
+
+    def cells(self, indexes: Iterable[int]) -> list[_SnapshotCell]:
+        return [
+            _SnapshotCell(index // self.rows, index % self.rows, self._values[self._codes[index]]) for index in indexes
+        ]
+
+    def cells_array1d(self) -> list[_SnapshotCell]:
+        return self.cells(range(len(self._codes)))
+
+    def cell_index(self, column: int, row: int) -> int:
+        return column * self.rows + row
+
+    def changed_since(self, version: int) -> array:
+        return _changed_since(self._stamps, self._full_version, self.version, len(self._codes), version)
+
+    def get_cells(self, only_value: bool = True) -> list[list[str | None]]:
+        return [
+            [self._values[code] for code in self._codes[column * self.rows:(column + 1) * self.rows]]
+            for column in range(self.columns)
+        ]
+
+    def convert_to_text(self, replace_none: str = '') -> str:
+        texts: list[str] = [replace_none, *self._values[1:]]
+        return ''.join([
+            ''.join([texts[code] for code in self._codes[row::self.rows]]) + '\n'
+            for row in range(self.rows)
+        ])
+
+
+class _Keyframe:
+    """ Full grid of codes shared by the delta frames that are encoded against it """
+
+    __slots__ = ('codes',)
+
+    def __init__(self, codes: array):
+        self.codes: array = array(_CODE_TYPE, codes)
+
+    @classmethod
+    def mapped(cls, codes: memoryview | array) -> '_Keyframe':
+        """ Keyframe of a loaded project, codes (may be a view into the file) are not copied """
+        key = cls.__new__(cls)
+        key.codes = codes
+        return key
+
+
+class _FrameRecord:
+    """ Encoded frame: keyframe (None for an empty grid) + sparse cell overrides """
+
+    __slots__ = ('columns', 'rows', 'key', 'indexes', 'codes', 'version')
+
+    def __init__(self, columns: int, rows: int, key: _Keyframe | None, indexes: array, codes: array):
+        self.columns: int = columns
+        self.rows: int = rows
+        self.key: _Keyframe | None = key
+        self.indexes: array = indexes
+        self.codes: array = codes
+        self.version: int = _CLOCK.tick()
+
+    def decode(self) -> array:
+        source: array | memoryview = _empty_codes(self.columns * self.rows) if self.key is None else self.key.codes
+        codes: array = array(_CODE_TYPE)
+        codes.frombytes(memoryview(source).cast('B'))
+        for index, code in zip(self.indexes, self.codes):
+            codes[index] = code
+        return codes
+
+
+class _DeltaFrames(MutableSequence):
+    """
+        Frames of an art board stored as periodic keyframes plus sparse cell deltas.
+
+        Reading a frame decodes it into a regular _Table, the last decoded tables are kept
+        in a small LRU cache. Edits made to a cached table are encoded back when it leaves
+        the cache, so a table taken from this sequence must not be kept between frame switches.
+    """
+
+    def __init__(self, palette: _Palette, keyframe_interval: int = 32, cache_size: int = 8):
+        self._palette: _Palette = palette
+        self._keyframe_interval: int = keyframe_interval
+        self._cache_size: int = cache_size
+        self._records: list[_FrameRecord] = list()
+        self._cache: OrderedDict[_FrameRecord, tuple[_Table, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: int) -> _Table:
+        record: _FrameRecord = self._records[index]
+        cached: tuple[_Table, int] | None = self._cache.get(record)
+
+        if cached is not None:
+            self._cache.move_to_end(record)
+            return cached[0]
+
+        table: _Table = _Table.from_codes(record.columns, record.rows, self._palette, record.decode())
+        self._cache[record] = (table, table.version)
+
+        while len(self._cache) > self._cache_size:
+            self._evict(next(iter(self._cache)))
+        return table
+
+    def __setitem__(self, index: int, table: _Table) -> None:
+        record: _FrameRecord = self._records[index]
+        cached: tuple[_Table, int] | None = self._cache.pop(record, None)
+        self._encode(record, table, self._keyframe_candidate(index))
+
+        if cached is None:
+            return
+        if cached[0] is table:
+            self._cache[record] = (table, table.version)
+
+    def __delitem__(self, index: int) -> None:
+        self._drop(self._records.pop(index))
+
+    def insert(self, index: int, table: _Table) -> None:
+        index = _insert_position(index, len(self._records))
+        record = _FrameRecord(table.columns, table.rows, None, array('I'), array(_CODE_TYPE))
+        self._encode(record, table, self._keyframe_candidate(index))
+        self._records.insert(index, record)
+
+    def version(self, index: int) -> int:
+        """ Version of the last change of a frame, without decoding it """
+        record: _FrameRecord = self._records[index]
+        cached: tuple[_Table, int] | None = self._cache.get(record)
+        return record.version if cached is None or cached[0].version == cached[1] else cached[0].version
+
+    def append_empty(self, columns: int, rows: int) -> None:
+        self._records.append(_FrameRecord(columns, rows, None, array('I'), array(_CODE_TYPE)))
+
+    def append_mapped(self, columns: int, rows: int, codes: memoryview | array) -> None:
+        """ Append a loaded frame as its own keyframe, codes (an array or a view into a file) are not copied """
+        record = _FrameRecord(columns, rows, None, array('I'), array(_CODE_TYPE))
+        self._assign(record, _Keyframe.mapped(codes), array('I'), array(_CODE_TYPE))
+        self._records.append(record)
+
+    def snapshot(self, index: int, values: tuple[str | None, ...]) -> '_TableSnapshot':
+        """ Snapshot of a frame without decoding it into the cache (a keyframe is shared, not copied) """
+        record: _FrameRecord = self._records[index]
+        cached: tuple[_Table, int] | None = self._cache.get(record)
+        if cached is not None:
+            return cached[0].snapshot()
+
+        codes: memoryview | array = record.key.codes if record.key is not None and not record.indexes else record.decode()
+        return _TableSnapshot(
+            columns=record.columns,
+            rows=record.rows,
+            key=record.version,
+            version=record.version,
+            full_version=record.version,
+            codes=codes,
+            stamps=None,
+            values=values
+        )
+
+    def drop_stamps(self, index: int) -> None:
+        """ Free the dirty map of a frame, only a decoded (cached) frame has one """
+        cached: tuple[_Table, int] | None = self._cache.get(self._records[index])
+        if cached is not None:
+            cached[0].drop_stamps()
+
+    def materialize(self) -> None:
+        """ Copy every keyframe read from a project file into memory, so the file can be closed or replaced """
+        keyframes: dict[_Keyframe, _Keyframe] = dict()
+        for record in self._records:
+            if record.key is None or isinstance(record.key.codes, array):
+                continue
+            if record.key not in keyframes:
+                keyframes[record.key] = _Keyframe(record.key.codes)
+            # Same content, the frame keeps its version
+            version: int = record.version
+            self._assign(record, keyframes[record.key], record.indexes, record.codes)
+            record.version = version
+
+    def copy(self, index: int, new_index: int) -> None:
+        """ Duplicate a frame in O(changed cells), the copy shares the keyframe of the original """
+        record: _FrameRecord = self._records[index]
+        cached: tuple[_Table, int] | None = self._cache.get(record)
+
+        if cached is not None and cached[0].version != cached[1]:
+            self._encode(record, cached[0], since=cached[1])
+            self._cache[record] = (cached[0], cached[0].version)
+
+        duplicate = _FrameRecord(record.columns, record.rows, None, array('I'), array(_CODE_TYPE))
+        self._assign(duplicate, record.key, array('I', record.indexes), array(_CODE_TYPE, record.codes))
+        self._records.insert(new_index, duplicate)
+
+    def _evict(self, record: _FrameRecord) -> None:
+        table, version = self._cache.pop(record)
+        if table.version != version:
+            self._encode(record, table, since=version)
+
+    def _drop(self, record: _FrameRecord) -> None:
+        self._cache.pop(record, None)
+        self._assign(record, None, array('I'), array(_CODE_TYPE))
+
+    def _keyframe_candidate(self, index: int) -> _Keyframe | None:
+        if index == 0 or index % self._keyframe_interval == 0:
+            return None
+        return self._records[index - 1].key
+
+    def _encode(self, record: _FrameRecord, table: _Table, key: _Keyframe | None = None, since: int | None = None):
+        """
+            Re-encode a record from table codes: delta against a keyframe or a new keyframe.
+            With since (version of the decoded table) only the cells changed after it are diffed.
+        """
+        key = record.key if key is None else key
+        codes: array = table.codes
+        empty: array = _empty_codes(len(codes))
+
+        if codes == empty:
+            self._assign(record, None, array('I'), array(_CODE_TYPE))
+            return
+
+        if key is not None and len(key.codes) != len(codes):
+            key = None
+
+        base: array = empty if key is None else key.codes
+        limit: int = int(len(codes) * _KEYFRAME_DELTA_RATIO)
+
+        if since is not None and key is record.key:
+            delta: dict[int, int] = dict(zip(record.indexes, record.codes))
+            for index in table.changed_since(since):
+                if codes[index] == base[index]:
+                    delta.pop(index, None)
+                else:
+                    delta[index] = codes[index]
+            indexes: array = array('I', sorted(delta))
+        else:
+            indexes: array = array('I')
+            for index, (code, base_code) in enumerate(zip(codes, base)):
+                if code != base_code:
+                    indexes.append(index)
+                    if len(indexes) > limit:
+                        break
+
+        if len(indexes) > limit:
+            self._assign(record, _Keyframe(codes), array('I'), array(_CODE_TYPE))
+        else:
+            self._assign(record, key, indexes, array(_CODE_TYPE, [codes[i] for i in indexes]))
+
+    def _assign(self, record: _FrameRecord, key: _Keyframe | None, indexes: array, codes: array) -> None:
+        """ Replace the content of a record """
+        record.key, record.indexes, record.codes = key, indexes, codes
+        record.version = _CLOCK.tick()
+
+
+class _JournalEntry:
+    """ Reversible edit of one frame: cell indexes with the codes before and after the edit """
+
+    __slots__ = ('frame', 'indexes', 'old_codes', 'new_codes')
+
+    def __init__(self, frame: int, indexes: array, old_codes: array, new_codes: array):
+        self.frame: int = frame
+        self.indexes: array = indexes
+        self.old_codes: array = old_codes
+        self.new_codes: array = new_codes
+
+    @property
+    def nbytes(self) -> int:
+        return _JOURNAL_ENTRY_OVERHEAD + sum(
+            len(item) * item.itemsize for item in (self.indexes, self.old_codes, self.new_codes)
+        )
+
+
+class _ArtJournal:
+    """
+        Undo / redo history of art board edits.
+
+        Every bulk edit is stored as one entry, restoring it is a single put_codes() call.
+        The oldest undo entries are evicted when the journal grows past memory_budget bytes.
+        Entries refer to frames by index, frame inserts / moves / deletes are passed on so the entries
+        follow their frames, only the entries of a deleted frame are dropped.
+    """
+
+    def __init__(self, memory_budget: int):
+        self._memory_budget: int = memory_budget
+        self._nbytes: int = 0
+        self._undo: deque[_JournalEntry] = deque()
+        self._redo: list[_JournalEntry] = list()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def record(self, frame: int, indexes: array, old_codes: array, new_codes: array) -> None:
+        changed: list[int] = [i for i, (old, new) in enumerate(zip(old_codes, new_codes)) if old != new]
+        if not changed:
+            return
+
+        if len(changed) != len(indexes):
+            indexes = array('I', [indexes[i] for i in changed])
+            old_codes = array(_CODE_TYPE, [old_codes[i] for i in changed])
+            new_codes = array(_CODE_TYPE, [new_codes[i] for i in changed])
+
+        for entry in self._redo:
+            self._nbytes -= entry.nbytes
+        self._redo.clear()
+
+        entry = _JournalEntry(frame, indexes, old_codes, new_codes)
+        self._undo.append(entry)
+        self._nbytes += entry.nbytes
+
+        while self._nbytes > self._memory_budget and len(self._undo) > 1:
+            self._nbytes -= self._undo.popleft().nbytes
+
+    def undo(self, tables: Sequence[_Table]) -> _JournalEntry | None:
+        if not self._undo:
+            return None
+
+        entry: _JournalEntry = self._undo.pop()
+        tables[entry.frame].put_codes(entry.indexes, entry.old_codes)
+        self._redo.append(entry)
+        return entry
+
+    def redo(self, tables: Sequence[_Table]) -> _JournalEntry | None:
+        if not self._redo:
+            return None
+
+        entry: _JournalEntry = self._redo.pop()
+        tables[entry.frame].put_codes(entry.indexes, entry.new_codes)
+        self._undo.append(entry)
+        return entry
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self._nbytes = 0
+
+    def insert_frame(self, index: int) -> None:
+        """ A frame was inserted at index """
+        for entry in (*self._undo, *self._redo):
+            if entry.frame >= index:
+                entry.frame += 1
+
+    def delete_frame(self, index: int) -> None:
+        """ The frame at index was deleted, its entries are dropped """
+        for entries in (self._undo, self._redo):
+            for entry in [entry for entry in entries if entry.frame == index]:
+                entries.remove(entry)
+                self._nbytes -= entry.nbytes
+        for entry in (*self._undo, *self._redo):
+            if entry.frame > index:
+                entry.frame -= 1
+
+    def move_frame(self, old_index: int, new_index: int) -> None:
+        """ The frame at old_index was taken out and inserted at new_index (of the shorter sequence) """
+        for entry in (*self._undo, *self._redo):
+            if entry.frame == old_index:
+                entry.frame = new_index
+                continue
+            frame: int = entry.frame - (entry.frame > old_index)
+            entry.frame = frame + (frame >= new_index)
 
 
 class _ArtBoardResize:
@@ -170,9 +794,22 @@ class _ArtBoardResize:
 
 
 class _ArtBoard:
-    def __init__(self):
+    def __init__(
+            self,
+            delta_frames: bool = False,
+            keyframe_interval: int = 32,
+            cache_size: int = 8,
+            journal_budget: int = 4 * 1024 * 1024
+    ):
         self._index: int = 0
-        self._tables: list[_Table] = list()
+        self._palette: _Palette = _Palette()
+        self._journal: _ArtJournal = _ArtJournal(memory_budget=journal_budget)
+        self._tables: list[_Table] | _DeltaFrames = (
+            _DeltaFrames(self._palette, keyframe_interval=keyframe_interval, cache_size=cache_size)
+            if delta_frames else list()
+        )
+        # Opened project file the frames are read from (kept open while frames refer to it)
+        self._source = None
 
     @property
     def index(self) -> int:
@@ -181,10 +818,39 @@ class _ArtBoard:
     @index.setter
     def index(self, value: int):
         self._validate_table_index(value)
+        if value != self._index:
+            # Only the edited frame keeps its dirty map (a uint32 per cell) for incremental redraws
+            self._drop_stamps(self._index)
         self._index = value
 
     @property
-    def arts(self) -> list[_Table]:
+    def palette(self) -> _Palette:
+        return self._palette
+
+    @property
+    def journal(self) -> _ArtJournal:
+        return self._journal
+
+    @property
+    def source(self):
+        """ Opened project file the frames are read from, None once released """
+        return self._source
+
+    @property
+    def version(self) -> int:
+        """ Current value of the version counter, pass it back to changed_frames() / changed_since() """
+        return _CLOCK.now
+
+    def frame_version(self, index: int) -> int:
+        if isinstance(self._tables, _DeltaFrames):
+            return self._tables.version(index)
+        return self._tables[index].version
+
+    def changed_frames(self, version: int) -> list[int]:
+        return [index for index in range(len(self._tables)) if self.frame_version(index) > version]
+
+    @property
+    def arts(self) -> list[_Table] | _DeltaFrames:
         return self._tables
 
     @property
@@ -194,18 +860,124 @@ class _ArtBoard:
     def count(self) -> int:
         return len(self._tables)
 
+    def snapshot(self, index: int) -> _TableSnapshot:
+        if isinstance(self._tables, _DeltaFrames):
+            return self._tables.snapshot(index, self._palette.values())
+        return self._tables[index].snapshot()
+
+    def snapshots(self) -> list[_TableSnapshot]:
+        """ Immutable copies of every frame for a worker thread, delta frames are not decoded into the cache """
+        return [self.snapshot(index) for index in range(len(self._tables))]
+
+    def load_frames(self, values: Sequence[str | None], frames: Iterable[tuple[int, int, memoryview | array]], source=None):
+        """
+            Append frames read from a project file: values is the palette of the file, frames are (columns, rows, codes).
+            Delta frames keep the codes in place and decode them on first access, source is kept open meanwhile.
+        """
+        for code, value in enumerate(values):
+            if self._palette.intern(value) != code:
+                raise ValueError(f'Invalid palette: {value} (duplicate value or not an empty palette)')
+
+        self._journal.clear()
+        for columns, rows, codes in frames:
+            self._validate_table_size(columns, rows)
+            if len(codes) != columns * rows:
+                raise ValueError(f'Invalid frame: {len(codes)} cells (expected {columns} * {rows})')
+            if codes and max(codes) >= len(values):
+                raise ValueError(f'Invalid frame: code {max(codes)} is out of the palette ({len(values)} values)')
+            if isinstance(self._tables, _DeltaFrames):
+                self._tables.append_mapped(columns, rows, codes)
+            else:
+                self._tables.append(_Table.from_codes(columns, rows, self._palette, array(_CODE_TYPE, codes)))
+
+        self._source = source if isinstance(self._tables, _DeltaFrames) else None
+
+    def release_source(self) -> None:
+        """
+            Read the rest of the opened project file into memory and close it (before the file is overwritten).
+            OSError if the file can't be unmapped yet (frame views are still used, e.g. by an export),
+            the source stays open then.
+        """
+        if self._source is None:
+            return
+        if isinstance(self._tables, _DeltaFrames):
+            self._tables.materialize()
+        if not self._source.close():
+            raise OSError('The project file is still in use, try again once the running export is done')
+        self._source = None
+
+    def close_source(self) -> None:
+        """ Close the opened project file of an art board that is dropped, no frame is read """
+        if self._source is None:
+            return
+        # Views still in use keep the mapping alive until they are gone
+        self._source.close()
+        self._source = None
+
+    def edit_cells(self, cells: list[tuple[int, int]], value: str | None) -> None:
+        """ Journaled edit of the current art: every (column, row) in cells gets the same value """
+        table: _Table = self.art
+        indexes: array = array('I', [table.cell_index(column, row) for column, row in cells])
+        codes: array = array(_CODE_TYPE, [self._palette.intern(value)]) * len(indexes)
+        self._journal.record(self._index, indexes, table.put_codes(indexes, codes), codes)
+
+    def clear_art(self) -> None:
+        """ Journaled clear of the current art """
+        table: _Table = self.art
+        indexes: array = array('I', [index for index, code in enumerate(table.codes) if code != _Palette.EMPTY])
+        codes: array = array(_CODE_TYPE, _empty_codes(len(indexes)))
+        self._journal.record(self._index, indexes, table.put_codes(indexes, codes), codes)
+
+    def undo(self) -> _JournalEntry | None:
+        entry: _JournalEntry | None = self._journal.undo(self._tables)
+        if entry is not None and entry.frame != self._index:
+            self._drop_stamps(entry.frame)
+        return entry
+
+    def redo(self) -> _JournalEntry | None:
+        entry: _JournalEntry | None = self._journal.redo(self._tables)
+        if entry is not None and entry.frame != self._index:
+            self._drop_stamps(entry.frame)
+        return entry
+
     def add_art(self, column: int, row: int):
         self._validate_table_size(column, row)
-        self._tables.append(_Table(columns=column, rows=row))
+        if isinstance(self._tables, _DeltaFrames):
+            self._tables.append_empty(column, row)
+        else:
+            self._tables.append(_Table(columns=column, rows=row, palette=self._palette))
+
+    def copy_art(self, index: int, new_index: int):
+        self._validate_table_index(index)
+        self._journal.insert_frame(_insert_position(new_index, len(self._tables)))
+        if isinstance(self._tables, _DeltaFrames):
+            self._tables.copy(index, new_index)
+            return
+
+        self._tables.insert(new_index, self._tables[index].clone())
 
     def delete_art(self, index: int):
         self._validate_table_index(index)
-        del self._tables[index]
+        self._journal.delete_frame(index)
+        if isinstance(self._tables, _DeltaFrames):
+            del self._tables[index]
+        else:
+            self._tables.pop(index)
 
     def insert_art(self, art, old_index, new_index: int):
+        self._validate_table_index(old_index)
         self._tables.pop(old_index)
+        self._journal.move_frame(old_index, _insert_position(new_index, len(self._tables)))
         self._tables.insert(new_index, art)
 
+    def _drop_stamps(self, index: int) -> None:
+        if not 0 <= index < len(self._tables):
+            return
+        if isinstance(self._tables, _DeltaFrames):
+            self._tables.drop_stamps(index)
+        else:
+            self._tables[index].drop_stamps()
+
     def _validate_table_index(self, index: int) -> None:
         if not (0 <= index < len(self._tables)):
             raise ValueError(f'Invalid value: {index} (range of values)')
@@ -222,7 +994,7 @@ class ModelArt(metaclass=UtilMetaSingleton):
     def __init__(self):
         self._size_art_board: list[int, int] | tuple[int, int] | None = None
         self._filepath: str | None = None
-        self._art_board = _ArtBoard()
+        self._art_board = _ArtBoard(**SETTINGS_ART_BOARD_STORAGE, journal_budget=SETTINGS_ART_BOARD_JOURNAL_BUDGET)
         self._resize = _ArtBoardResize()
 
     @property
@@ -265,14 +1037,46 @@ class ModelArt(metaclass=UtilMetaSingleton):
         ):
             return False
 
+    def open_project(self, filepath: str) -> None:
+        """
+            Replace the art board with the frames of a project (.emart or JSON written by api_export_frames).
+            Frames are kept packed and decoded into a table when opened, .emart frames are read in place.
+        """
+        self._validate_filepath(filepath)
+        art_board = _ArtBoard(
+            **{**SETTINGS_ART_BOARD_STORAGE, 'delta_frames': True},
+            journal_budget=SETTINGS_ART_BOARD_JOURNAL_BUDGET
+        )
+
+        if filepath.endswith('.emart'):
+            source = ApiEmartReader(filepath)
+            try:
+                art_board.load_frames(source.values, (source.frame(i) for i in range(len(source))), source=source)
+            except ValueError:
+                source.close()
+                raise
+        else:
+            values, frames = api_import_frames(filepath)
+            art_board.load_frames(values, frames)
+
+        if not art_board.count():
+            art_board.close_source()
+            raise ValueError(f'Project {filepath} has no frames')
+
+        art_board.index = art_board.count() - 1
+        self._art_board.close_source()
+        self._art_board = art_board
+        self._size_art_board = (art_board.art.columns, art_board.art.rows)
+        self._filepath = filepath
+
     @staticmethod
     def _validate_filepath(value: str) -> None:
         if not isinstance(value, str):
             raise ValueError(f'Invalid value type: {value} (not type "str")')
         if not os.path.isfile(value):
             raise FileNotFoundError(f"File: {value} not exists")
-        if not value.endswith('.json'):
-            raise ValueError("The file must have an extension .json")
+        if not value.endswith(_PROJECT_EXTENSIONS):
+            raise ValueError(f"The file must have an extension {' or '.join(_PROJECT_EXTENSIONS)}")
         if not os.access(value, os.R_OK):
             raise PermissionError(f"Denied access to read the file {value}.")
 
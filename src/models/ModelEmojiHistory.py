@@ -1,4 +1,4 @@
-from emoji import is_emoji
+from plugins.api_emoji_validator.api_emoji_validator import api_is_emoji
 
 _LIMIT_ENTRY: int = 15
 
@@ -48,7 +48,7 @@ class ModelEmojiHistory:
     def _validate_entry(self, entry: str):
         if not isinstance(entry, str):
             raise ValueError(f'Invalid value type: {entry} (not type "str")')
-        if not is_emoji(entry):
+        if not api_is_emoji(entry):
             print(entry)
             raise ValueError(f'Invalid value type: {entry} (not type "emoji")')
         if entry in self._entry:
@@ -0,0 +1,44 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it, done once at import (writes run in worker threads)
+    umask: int = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_UMASK: int = _read_umask()
+_NEW_FILE_MODE: int = 0o666
+
+
+def _file_mode(filepath: str) -> int:
+    """ Mode of the file being replaced, or the mode open() gives a new file """
+    try:
+        return stat.S_IMODE(os.stat(filepath).st_mode)
+    except FileNotFoundError:
+        return _NEW_FILE_MODE & ~_UMASK
+
+
+@contextmanager
+def api_atomic_write(filepath: str) -> Iterator[BinaryIO]:
+    """
+        Binary file written next to filepath and moved over it when the block ends, a reader never sees
+        a partial file. The file gets the mode of the replaced file (a new one the default of open()),
+        on error the temporary file is removed and filepath is left as it was.
+    """
+    descriptor, temp_filepath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), suffix='.tmp')
+
+    try:
+        with open(descriptor, mode='wb') as file:
+            yield file
+        # mkstemp creates the file owner-only (0600)
+        os.chmod(temp_filepath, _file_mode(filepath))
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        os.remove(temp_filepath)
+        raise
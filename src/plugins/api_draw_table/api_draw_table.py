@@ -1,7 +1,14 @@
-from PIL import Image, ImageDraw, ImageFont
+from abc import abstractmethod
+from collections import OrderedDict
+from PIL import Image, ImageFont
 from dataclasses import dataclass
 
 
+_INK_WHITE: int = -1
+_FRAMES_CACHE_SIZE: int = 32
+_FULL_REDRAW_RATIO: float = 0.25
+
+
 @dataclass
 class _ContractCell:
     column: int
@@ -9,6 +16,30 @@ class _ContractCell:
     value: str | None
 
 
+@dataclass
+class _ContractTable:
+    columns: int
+    rows: int
+    key: int
+    version: int
+
+    @abstractmethod
+    def cells_array1d(self) -> list[_ContractCell]:
+        pass
+
+    @abstractmethod
+    def cells(self, indexes) -> list[_ContractCell]:
+        pass
+
+    @abstractmethod
+    def cell_index(self, column: int, row: int) -> int:
+        pass
+
+    @abstractmethod
+    def changed_since(self, version: int):
+        pass
+
+
 class _Cell(_ContractCell):
     def __init__(self, column: int, row: int, value: str | None, font_size: int, padding: int):
         super().__init__(column, row, value)
@@ -34,27 +65,96 @@ class _Cell(_ContractCell):
 
 
 class ApiDrawTable:
+    # Pre-rendered glyphs shared by every instance: (font path, font size, text) -> (RGBA sprite, offset)
+    _sprites: dict[tuple[str, int, str], tuple[Image.Image, tuple[int, int]]] = dict()
+
     def __init__(self, font: tuple[str, int], bg: str):
         self._background_color = bg
         self._image_font: ImageFont = ImageFont.truetype(font[0], font[1])
+        # Last render of each table: table key -> (image, table version)
+        self._frames: OrderedDict[int, tuple[Image.Image, int]] = OrderedDict()
 
     def draw_table(self, cells: list[_ContractCell]) -> Image:
         table_cells: tuple[_Cell, ...] = self._table_data(cells)
         image_size: tuple[int, int] = self._calculate_img_size(table_cells)
         image = Image.new("RGB", image_size, self._background_color)
-        draw = ImageDraw.Draw(image)
 
         for cell in table_cells:
-            draw.text(
-                xy=(cell.x, cell.y),
-                text='' if cell.value is None else cell.value,
-                embedded_color=True,
-                font=self._image_font,
-                anchor='mm'
-            )
+            if not cell.value:
+                continue
+
+            sprite, offset = self._sprite(cell.value)
+            image.paste(sprite, (cell.x + offset[0], cell.y + offset[1]), sprite)
 
         return image
 
+    def draw_table_changes(self, table: _ContractTable) -> Image:
+        """
+            Same image as draw_table, repaints only the cells changed since the last render of the table.
+            The returned image is kept by the renderer and updated in place by the next call for the same table.
+        """
+        cached: tuple[Image.Image, int] | None = self._frames.get(table.key)
+
+        if cached is None:
+            image = self.draw_table(table.cells_array1d())
+        else:
+            image = cached[0]
+            changed = table.changed_since(cached[1])
+
+            if len(changed) > table.columns * table.rows * _FULL_REDRAW_RATIO:
+                image = self.draw_table(table.cells_array1d())
+            else:
+                for index in changed:
+                    self._redraw_cell(image, table, index)
+
+        self._frames[table.key] = (image, table.version)
+        self._frames.move_to_end(table.key)
+        while len(self._frames) > _FRAMES_CACHE_SIZE:
+            self._frames.popitem(last=False)
+
+        return image
+
+    def _redraw_cell(self, image: Image.Image, table: _ContractTable, index: int) -> None:
+        """
+            Repaint the box of one cell (plus the padding glyphs may overflow into)
+            with every neighbour whose glyph can reach it, in the draw_table order
+        """
+        cell: _Cell = self._table_data(table.cells([index]))[0]
+        half, margin = cell.width // 2, cell.width - int(self._image_font.size)
+        box: tuple[int, int] = (cell.x - half - margin, cell.y - half - margin)
+        tile = Image.new("RGB", (cell.width + margin * 2, cell.height + margin * 2), self._background_color)
+
+        neighbours: list[int] = sorted(
+            table.cell_index(column, row)
+            for column in range(max(cell.column - 1, 0), min(cell.column + 2, table.columns))
+            for row in range(max(cell.row - 1, 0), min(cell.row + 2, table.rows))
+        )
+
+        for neighbour in self._table_data(table.cells(neighbours)):
+            if not neighbour.value:
+                continue
+
+            sprite, offset = self._sprite(neighbour.value)
+            tile.paste(sprite, (neighbour.x + offset[0] - box[0], neighbour.y + offset[1] - box[1]), sprite)
+
+        image.paste(tile, box)
+
+    def _sprite(self, text: str) -> tuple[Image.Image, tuple[int, int]]:
+        """
+            Glyph rasterized once through FreeType, the same color bitmap and alpha mask
+            ImageDraw.text(embedded_color=True, anchor='mm') would paste at the cell center
+        """
+        key: tuple[str, int, str] = (self._image_font.path, int(self._image_font.size), text)
+        sprite: tuple[Image.Image, tuple[int, int]] | None = self._sprites.get(key)
+
+        if sprite is None:
+            mask, offset = self._image_font.getmask2(text, mode='RGBA', anchor='mm', ink=_INK_WHITE)
+            image = Image.new('RGBA', mask.size)
+            image.im.paste(mask, (0, 0, *mask.size))
+            sprite = self._sprites[key] = (image, offset)
+
+        return sprite
+
     @staticmethod
     def _calculate_img_size(table_cells) -> tuple[int, int]:
         cell: _Cell = table_cells[-1]
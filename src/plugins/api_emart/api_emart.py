@@ -0,0 +1,264 @@
+import mmap
+import struct
+import sys
+import zlib
+from abc import abstractmethod
+from array import array
+from dataclasses import dataclass
+from typing import Sequence
+
+from plugins.api_atomic_write.api_atomic_write import api_atomic_write
+
+
+# Binary project container (.emart), all numbers are little-endian:
+#   header       magic, version, frame count, palette size, palette offset, frame table offset, log offset
+#   palette      palette size - 1 strings (code 0 is the empty cell): uint16 byte length + utf-8 bytes
+#   frame table  frame count entries: uint64 grid offset, uint32 columns, uint32 rows
+#   grids        uint16 palette codes, column by column (columns * rows), 8 bytes aligned
+#   log          records appended by incremental saves, from log offset to the end of the file
+#
+# Log record: magic, payload size, payload crc32, payload:
+#   frame count, first new palette code, new palette strings count, changed frames count,
+#   new palette strings, then for every changed frame: index, columns, rows, padding, grid
+# A record that is cut or damaged (interrupted save) ends the log, the records before it stay valid.
+_MAGIC: bytes = b'EMART\x00'
+_VERSION: int = 1
+_HEADER = struct.Struct('<6sHIIQQQ')
+_FRAME_ENTRY = struct.Struct('<QII')
+_STRING_LENGTH = struct.Struct('<H')
+_LOG_MAGIC: bytes = b'EMLG'
+_LOG_RECORD = struct.Struct('<4sII')
+_LOG_PAYLOAD = struct.Struct('<IIII')
+_LOG_FRAME = struct.Struct('<III')
+_CODE_TYPE: str = 'H'
+_ALIGNMENT: int = 8
+
+
+@dataclass
+class _ContractFrame:
+    columns: int
+    rows: int
+
+    @property
+    @abstractmethod
+    def codes(self) -> array:
+        pass
+
+
+def _padding(offset: int) -> bytes:
+    return bytes(-offset % _ALIGNMENT)
+
+
+def _little_endian(codes) -> bytes:
+    if sys.byteorder == 'little':
+        return bytes(codes)
+    swapped: array = array(_CODE_TYPE, codes)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _encode_strings(values: Sequence[str]) -> bytes:
+    return b''.join([_STRING_LENGTH.pack(len(data)) + data for data in (value.encode('utf-8') for value in values)])
+
+
+def api_write_emart(filepath: str, frames: Sequence[_ContractFrame], values: Sequence[str | None]) -> int:
+    """
+        Write frames as raw palette code grids, values is the palette the codes refer to (values[0] is None).
+        Frames are written one by one, the frame table is filled in at the end.
+        The file is written next to filepath and moved over it, so a mapped previous version stays intact.
+        Returns the size of the file.
+    """
+    with api_atomic_write(filepath) as file:
+        file.write(bytes(_HEADER.size))
+
+        palette_offset: int = file.tell()
+        file.write(_encode_strings(values[1:]))
+        file.write(_padding(file.tell()))
+
+        table_offset: int = file.tell()
+        file.write(bytes(_FRAME_ENTRY.size * len(frames)))
+
+        entries: list[bytes] = list()
+        for frame in frames:
+            entries.append(_FRAME_ENTRY.pack(file.tell(), frame.columns, frame.rows))
+            file.write(_little_endian(frame.codes))
+            file.write(_padding(file.tell()))
+
+        size: int = file.tell()
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(entries), len(values), palette_offset, table_offset, size))
+        file.seek(table_offset)
+        file.write(b''.join(entries))
+    return size
+
+
+def api_append_emart(
+        filepath: str,
+        size: int,
+        count: int,
+        frames: dict[int, _ContractFrame],
+        values: Sequence[str | None],
+        first_value: int
+) -> int:
+    """
+        Append one log record to a file written by api_write_emart: the new frame count, the palette values
+        from first_value on and the frames that changed (index -> frame). size is the end of the last valid
+        record, anything after it is overwritten. Returns the new size of the file.
+    """
+    offset: int = size + _LOG_RECORD.size
+    chunks: list[bytes] = [
+        _LOG_PAYLOAD.pack(count, first_value, len(values) - first_value, len(frames)),
+        _encode_strings(values[first_value:])
+    ]
+    offset += len(chunks[0]) + len(chunks[1])
+
+    for index, frame in sorted(frames.items()):
+        entry: bytes = _LOG_FRAME.pack(index, frame.columns, frame.rows)
+        padding: bytes = _padding(offset + len(entry))
+        grid: bytes = _little_endian(frame.codes)
+        chunks += [entry, padding, grid]
+        offset += len(entry) + len(padding) + len(grid)
+
+    payload: bytes = b''.join(chunks)
+    with open(filepath, 'r+b') as file:
+        file.seek(size)
+        file.write(_LOG_RECORD.pack(_LOG_MAGIC, len(payload), zlib.crc32(payload)) + payload)
+        file.truncate()
+    return offset
+
+
+def _validate_codes(index: int, codes: Sequence[int], palette_size: int) -> None:
+    # Grids are little-endian, on other hosts a code can only be out of range when its swapped value is
+    if sys.byteorder != 'little':
+        codes = array(_CODE_TYPE, codes)
+        codes.byteswap()
+    if codes and max(codes) >= palette_size:
+        raise ValueError(f'Invalid frame {index}: code {max(codes)} is out of the palette ({palette_size} values)')
+
+
+class ApiEmartReader:
+    """
+        Memory-mapped .emart file: the header, palette, frame table and log are parsed on open,
+        frame grids are returned as views into the mapping and paged in only when read.
+    """
+
+    def __init__(self, filepath: str):
+        with open(filepath, 'rb') as file:
+            self._mmap: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._values, self._frames, self._log_offset = self._read_index()
+            self._size: int = self._read_log()
+        except (struct.error, UnicodeDecodeError) as error:
+            self._mmap.close()
+            raise ValueError(f'Invalid .emart file: {filepath} ({error})') from error
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def values(self) -> tuple[str | None, ...]:
+        return tuple(self._values)
+
+    @property
+    def size(self) -> int:
+        """ End of the last valid log record, the next record is appended here """
+        return self._size
+
+    @property
+    def log_size(self) -> int:
+        return self._size - self._log_offset
+
+    def frame(self, index: int) -> tuple[int, int, memoryview | array]:
+        """ (columns, rows, codes) of a frame, codes is a read-only view into the file on little-endian hosts """
+        offset, columns, rows = self._frames[index]
+        view: memoryview = memoryview(self._mmap)[offset:offset + columns * rows * 2]
+        if sys.byteorder == 'little':
+            return columns, rows, view.cast(_CODE_TYPE)
+
+        codes: array = array(_CODE_TYPE, view.tobytes())
+        codes.byteswap()
+        return columns, rows, codes
+
+    def close(self) -> bool:
+        """ Unmap the file, fails (False) while frame views are still in use """
+        try:
+            self._mmap.close()
+            return True
+        except BufferError:
+            return False
+
+    def _read_strings(self, offset: int, count: int, values: list[str | None]) -> int:
+        for _ in range(count):
+            (length,) = _STRING_LENGTH.unpack_from(self._mmap, offset)
+            offset += _STRING_LENGTH.size
+            values.append(self._mmap[offset:offset + length].decode('utf-8'))
+            offset += length
+        return offset
+
+    def _read_index(self) -> tuple[list[str | None], list[tuple[int, int, int]], int]:
+        header: tuple = _HEADER.unpack_from(self._mmap, 0)
+        magic, version, count, palette_size, palette_offset, table_offset, log_offset = header
+        if magic != _MAGIC:
+            raise ValueError('Not an .emart file')
+        if version != _VERSION:
+            raise ValueError(f'Unsupported .emart version: {version}')
+
+        values: list[str | None] = [None]
+        self._read_strings(palette_offset, palette_size - 1, values)
+
+        frames: list[tuple[int, int, int]] = list()
+        for index in range(count):
+            grid_offset, columns, rows = _FRAME_ENTRY.unpack_from(self._mmap, table_offset + index * _FRAME_ENTRY.size)
+            if grid_offset + columns * rows * 2 > len(self._mmap):
+                raise ValueError(f'Frame {index} is out of the file bounds')
+            frames.append((grid_offset, columns, rows))
+
+        return values, frames, log_offset
+
+    def _read_log(self) -> int:
+        offset: int = self._log_offset
+        while offset + _LOG_RECORD.size <= len(self._mmap):
+            magic, length, crc = _LOG_RECORD.unpack_from(self._mmap, offset)
+            start: int = offset + _LOG_RECORD.size
+            if magic != _LOG_MAGIC or start + length > len(self._mmap):
+                break
+            if zlib.crc32(memoryview(self._mmap)[start:start + length]) != crc:
+                break
+            if not self._apply_record(start):
+                break
+            offset = start + length
+        return offset
+
+    def _apply_record(self, offset: int) -> bool:
+        count, first_value, values_count, frames_count = _LOG_PAYLOAD.unpack_from(self._mmap, offset)
+        if first_value != len(self._values):
+            return False
+
+        values: list[str | None] = self._values.copy()
+        offset = self._read_strings(offset + _LOG_PAYLOAD.size, values_count, values)
+
+        frames: list[tuple[int, int, int] | None] = (self._frames + [None] * count)[:count]
+        for _ in range(frames_count):
+            index, columns, rows = _LOG_FRAME.unpack_from(self._mmap, offset)
+            offset += _LOG_FRAME.size
+            offset += -offset % _ALIGNMENT
+            if index >= count:
+                return False
+            if offset + columns * rows * 2 > len(self._mmap):
+                raise ValueError(f'Frame {index} of a log record is out of the file bounds')
+            codes: memoryview = memoryview(self._mmap)[offset:offset + columns * rows * 2].cast(_CODE_TYPE)
+            try:
+                _validate_codes(index, codes, len(values))
+            finally:
+                codes.release()
+            frames[index] = (offset, columns, rows)
+            offset += columns * rows * 2
+
+        if None in frames:
+            return False
+        self._values, self._frames = values, frames
+        return True
@@ -3,15 +3,163 @@
     A free emoji API sourced directly from unicode.org - always up to date.
 """
 
+import os
+import re
+import struct
+import threading
 import requests
-from time import sleep
-from json import dump, load
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from time import monotonic, sleep
+from json import dumps, load, loads
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from plugins.api_atomic_write.api_atomic_write import api_atomic_write
+
+
+_PLUGIN_DIRECTORY: str = os.path.dirname(os.path.abspath(__file__))
+_INDEX_FILENAME: str = 'emoji-store.index'
+_STORE_FILENAME: str = 'emoji-store.json'
+_INDEX_SOURCE_FILENAME: str = 'emoji-store-fix-double-emoji.json'
+_CHANGELOG_FILENAME: str = 'emoji-store.changelog.json'
+_STORE_FIELDS: tuple[str, ...] = ('slug', 'character', 'unicodeName', 'codePoint')
+
+# Skin tone sequences the bundled font draws as two emojis (the hand and a color swatch), dropped from
+# emoji-store.json to make emoji-store-fix-double-emoji.json; a rule matches the whole codePoint
+_DOUBLE_EMOJI_RULES: tuple[re.Pattern, ...] = (
+    re.compile(r'(261D|270C|270D|1F590) 1F3F[B-F]'),
+)
+
+# Store refresh: parallel category requests, at most _API_RATE requests per second (bursts of _API_BURST),
+# responses cached in _API_CACHE_DIRECTORY and revalidated with If-None-Match / If-Modified-Since
+_API_URL: str = 'https://emoji-api.com/'
+_API_WORKERS: int = 4
+_API_RATE: float = 5.0
+_API_BURST: int = 5
+_API_TIMEOUT: float = 30.0
+_API_RETRIES: int = 3
+_API_CACHE_DIRECTORY: str = os.path.join(_PLUGIN_DIRECTORY, 'http-cache')
+
+# Index file: magic, version, sha256 of the source JSON, then sections of uint32 byte length + data:
+# categories, category -> subcategory offsets, subcategories, subcategory -> emoji offsets,
+# characters, unicode names, slugs, code points,
+# search trigrams, trigram -> emoji offsets, trigram emojis, search words, word -> emoji offsets, word emojis.
+# Strings are joined by new lines (not used by any value), offsets are uint32 arrays of count + 1 items.
+_INDEX_MAGIC: bytes = b'EMIX'
+_INDEX_VERSION: int = 2
+_INDEX_HEADER = struct.Struct('<4sH32s')
+_INDEX_SECTION = struct.Struct('<I')
+_INDEX_OFFSET_TYPE: str = 'I'
+_INDEX_SEPARATOR: str = '\n'
+# Kind of every section: s - strings, I - uint32 array
+_INDEX_SECTIONS: str = 'sIsIsssssIIsII'
+
+# Search terms shorter than a trigram are matched as word prefixes
+_SEARCH_GRAM: int = 3
+_SEARCH_WORDS = re.compile(r'[^\W_]+')
+
+
+def _write_atomic(filepath: str, data: bytes):
+    with api_atomic_write(filepath) as file:
+        file.write(data)
+
+
+class _TokenBucket:
+    """ Thread-safe rate limiter: rate tokens per second, up to capacity tokens saved up for a burst """
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate: float = rate
+        self._capacity: float = float(capacity)
+        self._tokens: float = float(capacity)
+        self._updated: float = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now: float = monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait: float = (1.0 - self._tokens) / self._rate
+            sleep(wait)
+
+
+class _ResponseCache:
+    """
+        JSON responses on disk, one file per request (the access key is not part of the key or the file)
+        with the validators of the response: ETag and Last-Modified.
+    """
+
+    def __init__(self, directory: str):
+        self._directory: str = directory
+
+    def _filepath(self, url: str, params: dict) -> str:
+        key: str = url + '?' + '&'.join(f'{name}={params[name]}' for name in sorted(params) if name != 'access_key')
+        return os.path.join(self._directory, sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url: str, params: dict) -> dict | None:
+        try:
+            with open(self._filepath(url, params), mode='r', encoding='utf-8') as file:
+                return load(fp=file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, params: dict, response: requests.Response):
+        entry: dict = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': response.json()
+        }
+        if entry['etag'] is None and entry['last_modified'] is None:
+            return
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            _write_atomic(self._filepath(url, params), dumps(entry, ensure_ascii=False).encode('utf-8'))
+        except OSError:
+            pass
 
 
 class _EmojiApi:
-    def __init__(self, url: str, api_key: str):
-        self._url: str = url
+    """
+        One pooled session shared by all requests. Requests pass the token bucket first, 429 and 5xx responses
+        are retried with backoff (Retry-After is honored), cached responses are revalidated instead of refetched.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            api_key: str,
+            workers: int = _API_WORKERS,
+            rate: float = _API_RATE,
+            burst: int = _API_BURST,
+            cache_directory: str | None = _API_CACHE_DIRECTORY
+    ):
+        self._url: str = url.rstrip('/')
         self._api_key: str = api_key
+        self._bucket = _TokenBucket(rate=rate, capacity=burst)
+        self._cache: _ResponseCache | None = None if cache_directory is None else _ResponseCache(cache_directory)
+
+        retry = Retry(
+            total=_API_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+            raise_on_status=False
+        )
+        self._session = requests.Session()
+        self._session.mount(self._url, HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry))
+
+    def __enter__(self) -> '_EmojiApi':
+        return self
+
+    def __exit__(self, *args):
+        self._session.close()
 
     def api_get_categories(self) -> str | list | dict:
         return self._api_response(path='/categories', params={'access_key': self._api_key})
@@ -21,45 +169,532 @@ class _EmojiApi:
         return data
 
     def _api_response(self, path: str, params: dict) -> str | list | dict:
-        response = requests.get(url=self._url + path, params=params)
-        return response.json() if response.status_code == 200 else f'Error {response.status_code}: {response.text}'
+        url: str = self._url + path
+        cached: dict | None = None if self._cache is None else self._cache.get(url, params)
+        headers: dict = dict()
+        if cached is not None:
+            if cached['etag'] is not None:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified'] is not None:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        self._bucket.acquire()
+        try:
+            response = self._session.get(url=url, params=params, headers=headers, timeout=_API_TIMEOUT)
+        except requests.RequestException as error:
+            return f'Error: {error}'
+
+        if response.status_code == 304 and cached is not None:
+            return cached['body']
+        if response.status_code != 200:
+            return f'Error {response.status_code}: {response.text}'
+        if self._cache is not None:
+            self._cache.put(url, params, response)
+        return response.json()
+
+
+def _encode_store(data: dict) -> bytes:
+    return dumps(
+        obj=data,
+        indent=2,
+        ensure_ascii=False,
+    ).encode('utf-8')
 
 
 class _JsonAdapterEmojiStore:
-    def __init__(self):
+    def __init__(self, directory: str = _PLUGIN_DIRECTORY):
         super().__init__()
-        self._filename = 'emoji-store.json'
+        self._directory: str = directory
+        self._filename = _STORE_FILENAME
 
     def write(self, date: dict):
-        with open(file=self._filename, mode='w', encoding='utf-8') as file:
-            dump(
-                obj=date,
-                fp=file,
-                indent=2,
-                ensure_ascii=False,
-            )
+        _write_atomic(os.path.join(self._directory, self._filename), _encode_store(date))
 
     def read(self) -> dict:
-        with open(file=f'plugins/api_emoji_store/{self._filename}', mode='r', encoding='utf-8') as file:
+        with open(file=os.path.join(self._directory, self._filename), mode='r', encoding='utf-8') as file:
             return load(fp=file)
 
+    def write_fix_double_emoji(self, data: bytes):
+        _write_atomic(os.path.join(self._directory, _INDEX_SOURCE_FILENAME), data)
+
+    def read_fix_double_emoji_bytes(self) -> bytes | None:
+        try:
+            with open(file=os.path.join(self._directory, _INDEX_SOURCE_FILENAME), mode='rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def write_changelog(self, changelog: dict):
+        data: str = dumps(changelog, ensure_ascii=False, separators=(',', ':'))
+        _write_atomic(os.path.join(self._directory, _CHANGELOG_FILENAME), data.encode('utf-8'))
+
     @staticmethod
     def read_fix_double_emoji():
-        with open(file=f'plugins/api_emoji_store/emoji-store-fix-double-emoji.json', mode='r', encoding='utf-8') as file:
+        with open(file=os.path.join(_PLUGIN_DIRECTORY, _INDEX_SOURCE_FILENAME), mode='r', encoding='utf-8') as file:
             return load(fp=file)
 
 
-def create_json_file(api_key: str) -> None:
+def _fix_double_emoji(data: dict) -> dict:
+    """ Store without the entries matched by _DOUBLE_EMOJI_RULES """
+    return {
+        category: {
+            subcategory: [
+                emoji for emoji in emojis
+                if not any(rule.fullmatch(emoji['codePoint']) for rule in _DOUBLE_EMOJI_RULES)
+            ]
+            for subcategory, emojis in subcategories.items()
+        }
+        for category, subcategories in data.items()
+    }
+
+
+def _increasing(values: list[int]) -> set[int]:
+    """ Positions of a longest strictly increasing subsequence of values """
+    tails: list[int] = list()
+    tail_positions: list[int] = list()
+    previous: list[int] = [-1] * len(values)
+    for position, value in enumerate(values):
+        i: int = bisect_left(tails, value)
+        previous[position] = tail_positions[i - 1] if i else -1
+        if i == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[i] = value
+            tail_positions[i] = position
+
+    output: set[int] = set()
+    position: int = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        output.add(position)
+        position = previous[position]
+    return output
+
+
+def _diff_store(old: dict, new: dict) -> dict:
+    """
+        Changelog from old to new store keyed by codePoint:
+        categories - the subcategory names of every category of new, in order
+        removed    - code points gone from old, moved to another subcategory or reordered in it
+        renamed    - code point -> fields that changed, for emojis that stay in place
+        added      - [category, subcategory, position in new, emoji] for the new, moved and reordered emojis
+        Applying it to old (_apply_changelog) gives new.
+    """
+    locations: dict[str, tuple[str, str, int, dict]] = {
+        emoji['codePoint']: (category, subcategory, position, emoji)
+        for category, subcategories in old.items()
+        for subcategory, emojis in subcategories.items()
+        for position, emoji in enumerate(emojis)
+    }
+    kept: set[str] = set()
+    renamed: dict[str, dict] = dict()
+    added: list[list] = list()
+
+    for category, subcategories in new.items():
+        for subcategory, emojis in subcategories.items():
+            # Emojis of old that stay in this subcategory, those out of their old order are moved (added again)
+            stay: list[tuple[int, dict]] = list()
+            for position, emoji in enumerate(emojis):
+                location = locations.get(emoji['codePoint'])
+                if location is not None and location[:2] == (category, subcategory):
+                    stay.append((position, emoji))
+            ordered: set[int] = _increasing([locations[emoji['codePoint']][2] for _, emoji in stay])
+            stay_positions: set[int] = {stay[i][0] for i in ordered}
+
+            for position, emoji in enumerate(emojis):
+                code_point: str = emoji['codePoint']
+                if position not in stay_positions:
+                    added.append([category, subcategory, position, emoji])
+                    continue
+                kept.add(code_point)
+                old_emoji: dict = locations[code_point][3]
+                changes: dict = {
+                    field: emoji[field] for field in _STORE_FIELDS if emoji.get(field) != old_emoji.get(field)
+                }
+                if changes:
+                    renamed[code_point] = changes
+
+    return {
+        'categories': {category: list(subcategories) for category, subcategories in new.items()},
+        'removed': [code_point for code_point in locations if code_point not in kept],
+        'renamed': renamed,
+        'added': added
+    }
+
+
+def _apply_changelog(data: dict, changelog: dict) -> dict:
+    """ Store after the changelog of _diff_store, emojis not in the changelog are kept as they are """
+    removed: set[str] = set(changelog['removed'])
+    renamed: dict[str, dict] = changelog['renamed']
+    output: dict = {
+        category: {subcategory: list() for subcategory in subcategories}
+        for category, subcategories in changelog['categories'].items()
+    }
+
+    for category, subcategories in data.items():
+        for subcategory, emojis in subcategories.items():
+            for emoji in emojis:
+                if emoji['codePoint'] in removed:
+                    continue
+                output[category][subcategory].append({**emoji, **renamed.get(emoji['codePoint'], dict())})
+
+    # Every emoji before an added one is in place once the additions are inserted in position order
+    for category, subcategory, position, emoji in sorted(changelog['added'], key=lambda item: item[2]):
+        output[category][subcategory].insert(position, dict(emoji))
+    return output
+
+
+class _EmojiSearchIndex:
+    """
+        Search over unicode names, slugs and code points. Every query term has to match: a term of
+        _SEARCH_GRAM characters or more is a substring (intersection of its trigram postings, then a substring
+        check of the candidates), a shorter one is a word prefix (bisect in the sorted words).
+        Postings are emoji ids in store order, grams[i] holds gram_emojis[gram_offsets[i]:gram_offsets[i + 1]],
+        the same goes for words.
+    """
+
+    def __init__(
+            self,
+            texts: list[str],
+            grams: list[str],
+            gram_offsets: array,
+            gram_emojis: array,
+            words: list[str],
+            word_offsets: array,
+            word_emojis: array
+    ):
+        self._texts: list[str] = texts
+        self.grams: list[str] = grams
+        self.gram_offsets: array = gram_offsets
+        self.gram_emojis: array = gram_emojis
+        self.words: list[str] = words
+        self.word_offsets: array = word_offsets
+        self.word_emojis: array = word_emojis
+        self._gram_ids: dict[str, int] = {gram: i for i, gram in enumerate(grams)}
+
+    @staticmethod
+    def texts(names: list[str], slugs: list[str], code_points: list[str]) -> list[str]:
+        return [f'{name} {slug} {code_point}'.lower() for name, slug, code_point in zip(names, slugs, code_points)]
+
+    @staticmethod
+    def _postings(keys: dict[str, list[int]]) -> tuple[list[str], array, array]:
+        offsets: array = array(_INDEX_OFFSET_TYPE, [0])
+        emojis: array = array(_INDEX_OFFSET_TYPE)
+        ordered: list[str] = sorted(keys)
+        for key in ordered:
+            emojis.extend(keys[key])
+            offsets.append(len(emojis))
+        return ordered, offsets, emojis
+
+    @staticmethod
+    def _add(grams: dict[str, list[int]], words: dict[str, list[int]], emoji: int, text: str):
+        for gram in {text[i:i + _SEARCH_GRAM] for i in range(len(text) - _SEARCH_GRAM + 1)}:
+            grams.setdefault(gram, list()).append(emoji)
+        for word in set(_SEARCH_WORDS.findall(text)):
+            words.setdefault(word, list()).append(emoji)
+
+    @classmethod
+    def build(cls, texts: list[str]) -> '_EmojiSearchIndex':
+        grams: dict[str, list[int]] = dict()
+        words: dict[str, list[int]] = dict()
+        for emoji, text in enumerate(texts):
+            cls._add(grams, words, emoji, text)
+        return cls(texts, *cls._postings(grams), *cls._postings(words))
+
+    def patched(self, texts: list[str], old_to_new: list[int], changed: list[int]) -> '_EmojiSearchIndex':
+        """
+            Postings renumbered by old_to_new (-1 drops an emoji) plus the postings of the changed emojis (new ids
+            of added and renamed emojis, their old ids are dropped). Postings are not kept in id order, search
+            only intersects and sorts its result.
+        """
+        def renumber(keys: list[str], offsets: array, emojis: array) -> dict[str, list[int]]:
+            output: dict[str, list[int]] = dict()
+            for i, key in enumerate(keys):
+                postings: list[int] = [old_to_new[emoji] for emoji in emojis[offsets[i]:offsets[i + 1]]]
+                if -1 in postings:
+                    postings = [emoji for emoji in postings if emoji >= 0]
+                if postings:
+                    output[key] = postings
+            return output
+
+        grams: dict[str, list[int]] = renumber(self.grams, self.gram_offsets, self.gram_emojis)
+        words: dict[str, list[int]] = renumber(self.words, self.word_offsets, self.word_emojis)
+        for emoji in changed:
+            self._add(grams, words, emoji, texts[emoji])
+        return type(self)(texts, *self._postings(grams), *self._postings(words))
+
+    def _match_substring(self, term: str) -> set[int]:
+        postings: list[array] = list()
+        for i in range(len(term) - _SEARCH_GRAM + 1):
+            gram: int | None = self._gram_ids.get(term[i:i + _SEARCH_GRAM])
+            if gram is None:
+                return set()
+            postings.append(self.gram_emojis[self.gram_offsets[gram]:self.gram_offsets[gram + 1]])
+
+        postings.sort(key=len)
+        candidates: set[int] = set(postings[0]).intersection(*postings[1:])
+        if len(term) == _SEARCH_GRAM:
+            return candidates
+        return {emoji for emoji in candidates if term in self._texts[emoji]}
+
+    def _match_prefix(self, term: str) -> set[int]:
+        # Words sharing the prefix are neighbours in the sorted words, so are their postings
+        first: int = bisect_left(self.words, term)
+        last: int = bisect_left(self.words, term + '\U0010ffff', first)
+        return set(self.word_emojis[self.word_offsets[first]:self.word_offsets[last]])
+
+    def search(self, query: str) -> list[int]:
+        """ Emoji ids (store order) matching every whitespace separated term of query, all emojis if none """
+        terms: list[str] = sorted(set(query.lower().split()), key=len, reverse=True)
+        if not terms:
+            return list(range(len(self._texts)))
+
+        matches: set[int] | None = None
+        for term in terms:
+            emojis: set[int] = self._match_substring(term) if len(term) >= _SEARCH_GRAM else self._match_prefix(term)
+            matches = emojis if matches is None else matches & emojis
+            if not matches:
+                return list()
+        return sorted(matches)
+
+
+class _EmojiStoreIndex:
+    """
+        Emoji store as flat lists, one item per emoji in store order (characters, names, slugs, code points).
+        Subcategory i holds the emojis from subcategory_offsets[i] to subcategory_offsets[i + 1],
+        category i holds the subcategories from category_offsets[i] to category_offsets[i + 1].
+    """
+
+    def __init__(
+            self,
+            categories: list[str],
+            category_offsets: array,
+            subcategories: list[str],
+            subcategory_offsets: array,
+            characters: list[str],
+            names: list[str],
+            slugs: list[str],
+            code_points: list[str],
+            search: _EmojiSearchIndex
+    ):
+        self.categories: list[str] = categories
+        self.category_offsets: array = category_offsets
+        self.subcategories: list[str] = subcategories
+        self.subcategory_offsets: array = subcategory_offsets
+        self.characters: list[str] = characters
+        self.names: list[str] = names
+        self.slugs: list[str] = slugs
+        self.code_points: list[str] = code_points
+        self.search: _EmojiSearchIndex = search
+
+    def __len__(self) -> int:
+        return len(self.characters)
+
+    @classmethod
+    def from_json(cls, data: dict, search: _EmojiSearchIndex | None = None) -> '_EmojiStoreIndex':
+        """ Index of a store dict, the search postings are built unless search is given """
+        categories: list[str] = list()
+        category_offsets: array = array(_INDEX_OFFSET_TYPE, [0])
+        subcategories: list[str] = list()
+        subcategory_offsets: array = array(_INDEX_OFFSET_TYPE, [0])
+        characters, names, slugs, code_points = list(), list(), list(), list()
+
+        for category, category_subcategories in data.items():
+            categories.append(category)
+            for subcategory, emojis in category_subcategories.items():
+                subcategories.append(subcategory)
+                for emoji in emojis:
+                    characters.append(emoji['character'])
+                    names.append(emoji['unicodeName'])
+                    slugs.append(emoji['slug'])
+                    code_points.append(emoji['codePoint'])
+                subcategory_offsets.append(len(characters))
+            category_offsets.append(len(subcategories))
+
+        if search is None:
+            search = _EmojiSearchIndex.build(_EmojiSearchIndex.texts(names, slugs, code_points))
+        return cls(
+            categories, category_offsets, subcategories, subcategory_offsets,
+            characters, names, slugs, code_points, search
+        )
+
+    def to_json(self) -> dict:
+        """ The store dict the index was built from """
+        return {
+            category: {
+                self.subcategories[subcategory]: [
+                    {
+                        'slug': self.slugs[emoji],
+                        'character': self.characters[emoji],
+                        'unicodeName': self.names[emoji],
+                        'codePoint': self.code_points[emoji]
+                    }
+                    for emoji in self.subcategory_emojis(subcategory)
+                ]
+                for subcategory in self.category_subcategories(i)
+            }
+            for i, category in enumerate(self.categories)
+        }
+
+    def patched(self, changelog: dict) -> '_EmojiStoreIndex':
+        """
+            Index of the store after changelog (see _diff_store): the flat lists are rebuilt from the patched store,
+            the search postings are renumbered and only the added and renamed emojis are tokenized.
+        """
+        index: _EmojiStoreIndex = _EmojiStoreIndex.from_json(_apply_changelog(self.to_json(), changelog), self.search)
+        new_ids: dict[str, int] = {code_point: emoji for emoji, code_point in enumerate(index.code_points)}
+        renamed: dict[str, dict] = changelog['renamed']
+        old_to_new: list[int] = [
+            -1 if code_point in renamed else new_ids.get(code_point, -1) for code_point in self.code_points
+        ]
+        changed: list[int] = [new_ids[code_point] for code_point in renamed] + [
+            new_ids[entry['codePoint']] for _, _, _, entry in changelog['added']
+        ]
+        index.search = self.search.patched(
+            _EmojiSearchIndex.texts(index.names, index.slugs, index.code_points), old_to_new, changed
+        )
+        return index
+
+    @classmethod
+    def from_bytes(cls, data: bytes, digest: bytes) -> '_EmojiStoreIndex | None':
+        """ None if data is not an index of the source with this digest """
+        if len(data) < _INDEX_HEADER.size or _INDEX_HEADER.unpack_from(data) != (_INDEX_MAGIC, _INDEX_VERSION, digest):
+            return None
+
+        sections: list[bytes] = list()
+        offset: int = _INDEX_HEADER.size
+        while offset < len(data):
+            (length,) = _INDEX_SECTION.unpack_from(data, offset)
+            offset += _INDEX_SECTION.size
+            sections.append(data[offset:offset + length])
+            offset += length
+        if len(sections) != len(_INDEX_SECTIONS) or offset != len(data):
+            return None
+
+        values: list[list[str] | array] = list()
+        for section, kind in zip(sections, _INDEX_SECTIONS):
+            if kind == _INDEX_OFFSET_TYPE:
+                if len(section) % array(_INDEX_OFFSET_TYPE).itemsize:
+                    return None
+                offsets: array = array(_INDEX_OFFSET_TYPE)
+                offsets.frombytes(section)
+                values.append(offsets)
+            else:
+                values.append(section.decode('utf-8').split(_INDEX_SEPARATOR) if section else list())
+
+        names, slugs, code_points = values[5:8]
+        search = _EmojiSearchIndex(_EmojiSearchIndex.texts(names, slugs, code_points), *values[8:])
+        return cls(*values[:8], search)
+
+    def to_bytes(self, digest: bytes) -> bytes:
+        values: tuple[list[str] | array, ...] = (
+            self.categories, self.category_offsets, self.subcategories, self.subcategory_offsets,
+            self.characters, self.names, self.slugs, self.code_points,
+            self.search.grams, self.search.gram_offsets, self.search.gram_emojis,
+            self.search.words, self.search.word_offsets, self.search.word_emojis
+        )
+        sections: list[bytes] = [
+            value.tobytes() if kind == _INDEX_OFFSET_TYPE else _INDEX_SEPARATOR.join(value).encode('utf-8')
+            for value, kind in zip(values, _INDEX_SECTIONS)
+        ]
+        return _INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, digest) + b''.join(
+            _INDEX_SECTION.pack(len(section)) + section for section in sections
+        )
+
+    def category_subcategories(self, category: int) -> range:
+        return range(self.category_offsets[category], self.category_offsets[category + 1])
+
+    def subcategory_emojis(self, subcategory: int) -> range:
+        return range(self.subcategory_offsets[subcategory], self.subcategory_offsets[subcategory + 1])
+
+    def category_emojis(self, category: int) -> range:
+        subcategories: range = self.category_subcategories(category)
+        return range(self.subcategory_offsets[subcategories.start], self.subcategory_offsets[subcategories.stop])
+
+
+_index: _EmojiStoreIndex | None = None
+
+
+def _patch_index(cached: bytes, digest: bytes) -> _EmojiStoreIndex | None:
+    """ Cached index patched by the changelog of update_json_file, None unless it leads from the cache to digest """
+    try:
+        with open(os.path.join(_PLUGIN_DIRECTORY, _CHANGELOG_FILENAME), mode='r', encoding='utf-8') as file:
+            changelog: dict = load(fp=file)
+        source, target = bytes.fromhex(changelog['source']), bytes.fromhex(changelog['target'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if target != digest:
+        return None
+    index: _EmojiStoreIndex | None = _EmojiStoreIndex.from_bytes(cached, source)
+    return None if index is None else index.patched(changelog)
+
+
+def build_index(force: bool = False) -> _EmojiStoreIndex:
+    """
+        Compile the bundled store JSON into the index file next to it. The index is rebuilt when the
+        sha256 of the JSON changed (or force), a read-only plugin directory only skips the cache file.
+        A cached index of the previous JSON is patched by the changelog of update_json_file instead.
+    """
+    global _index
+
+    with open(os.path.join(_PLUGIN_DIRECTORY, _INDEX_SOURCE_FILENAME), mode='rb') as file:
+        source: bytes = file.read()
+    digest: bytes = sha256(source).digest()
+    index_filepath: str = os.path.join(_PLUGIN_DIRECTORY, _INDEX_FILENAME)
+
+    cached: bytes | None = None
+    if not force and os.path.isfile(index_filepath):
+        with open(index_filepath, mode='rb') as file:
+            cached = file.read()
+        _index = _EmojiStoreIndex.from_bytes(cached, digest)
+        if _index is not None:
+            return _index
+
+    _index = _patch_index(cached, digest) if cached is not None else None
+    if _index is None:
+        _index = _EmojiStoreIndex.from_json(loads(source.decode('utf-8')))
+    try:
+        _write_atomic(index_filepath, _index.to_bytes(digest))
+    except OSError:
+        pass
+    return _index
+
+
+def read_index() -> _EmojiStoreIndex:
+    """ Emoji store index, built or loaded once per process """
+    return _index or build_index()
+
+
+def search(query: str) -> list[int]:
+    """ Ids of the emojis in read_index() matching query, see _EmojiSearchIndex """
+    return read_index().search.search(query)
+
+
+def _fetch_store(api_key: str, url: str, workers: int, rate: float, cache_directory: str | None) -> dict:
+    """ The categories first, then the emojis of up to workers categories at a time """
     response_data: dict = dict()
-    emoji_api = _EmojiApi(url='https://emoji-api.com/', api_key=api_key)
-    api_request_get_categories: tuple = tuple(emoji_api.api_get_categories())
 
-    for categories in api_request_get_categories:
-        response_data[categories['slug']]: dict = {subcategory: list() for subcategory in categories['subCategories']}
-        api_request_get_emojis: str | list | dict = emoji_api.api_get_emojis_in_category(category=categories['slug'])
+    with _EmojiApi(url=url, api_key=api_key, workers=workers, rate=rate, cache_directory=cache_directory) as emoji_api:
+        api_request_get_categories: str | list | dict = emoji_api.api_get_categories()
+        if not isinstance(api_request_get_categories, list):
+            raise ConnectionError(f'Emoji store categories: {api_request_get_categories}')
+
+        for categories in api_request_get_categories:
+            response_data[categories['slug']]: dict = {
+                subcategory: list() for subcategory in categories['subCategories']
+            }
 
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            api_requests_get_emojis: list[str | list | dict] = list(executor.map(
+                emoji_api.api_get_emojis_in_category,
+                [categories['slug'] for categories in api_request_get_categories]
+            ))
+
+    for categories, api_request_get_emojis in zip(api_request_get_categories, api_requests_get_emojis):
+        # A missing category would read as every emoji of it removed
         if not isinstance(api_request_get_emojis, list):
-            continue
+            raise ConnectionError(f'Emoji store category {categories["slug"]}: {api_request_get_emojis}')
 
         for emoji in api_request_get_emojis:
             response_data[emoji['group']].setdefault(
@@ -71,11 +706,61 @@ def create_json_file(api_key: str) -> None:
                     'codePoint': emoji['codePoint']
                 }
             )
+    return response_data
 
-        sleep(2)
 
-    json_adapter = _JsonAdapterEmojiStore()
+def create_json_file(
+        api_key: str,
+        url: str = _API_URL,
+        directory: str = _PLUGIN_DIRECTORY,
+        workers: int = _API_WORKERS,
+        rate: float = _API_RATE,
+        cache_directory: str | None = _API_CACHE_DIRECTORY
+) -> None:
+    """
+        Fetch the whole store into directory/emoji-store.json and emoji-store-fix-double-emoji.json
+        (_DOUBLE_EMOJI_RULES applied), both files are replaced atomically once every category is fetched.
+    """
+    response_data: dict = _fetch_store(api_key, url, workers, rate, cache_directory)
+
+    json_adapter = _JsonAdapterEmojiStore(directory=directory)
+    json_adapter.write(date=response_data)
+    json_adapter.write_fix_double_emoji(_encode_store(_fix_double_emoji(response_data)))
+
+
+def update_json_file(
+        api_key: str,
+        url: str = _API_URL,
+        directory: str = _PLUGIN_DIRECTORY,
+        workers: int = _API_WORKERS,
+        rate: float = _API_RATE,
+        cache_directory: str | None = _API_CACHE_DIRECTORY
+) -> dict:
+    """
+        Fetch the store and merge it into the existing emoji-store-fix-double-emoji.json by codePoint: only
+        the emojis that were added, removed, renamed or moved change, _DOUBLE_EMOJI_RULES is applied to
+        the fetched emojis. emoji-store.json takes the fetched store as is.
+        The changelog (see _diff_store, plus sha256 hex digests of the fixed JSON before and after as source
+        and target) is returned and written to emoji-store.changelog.json, build_index patches the cached
+        index with it. Nothing is written to the fixed JSON when it does not change.
+    """
+    response_data: dict = _fetch_store(api_key, url, workers, rate, cache_directory)
+    fetched: dict = _fix_double_emoji(response_data)
+
+    json_adapter = _JsonAdapterEmojiStore(directory=directory)
+    source: bytes | None = json_adapter.read_fix_double_emoji_bytes()
+    store: dict = dict() if source is None else loads(source.decode('utf-8'))
+
+    changelog: dict = _diff_store(store, fetched)
+    merged: bytes = _encode_store(_apply_changelog(store, changelog))
+    changelog['source'] = sha256(source or b'').hexdigest()
+    changelog['target'] = sha256(merged).hexdigest()
+
     json_adapter.write(date=response_data)
+    if merged != source:
+        json_adapter.write_fix_double_emoji(merged)
+        json_adapter.write_changelog(changelog)
+    return changelog
 
 
 def read_json_file() -> dict:
@@ -0,0 +1,27 @@
+from functools import lru_cache
+
+from emoji import is_emoji
+
+from plugins.api_emoji_store import api_emoji_store
+
+
+_CACHE_SIZE: int = 1024
+_known_emojis: frozenset[str] = frozenset()
+
+
+def _load_known_emojis() -> frozenset[str]:
+    global _known_emojis
+
+    _known_emojis = frozenset(api_emoji_store.read_index().characters)
+    return _known_emojis
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _is_unknown_emoji(value: str) -> bool:
+    return is_emoji(value)
+
+
+def api_is_emoji(value) -> bool:
+    """ emoji.is_emoji with the bundled emoji store as a precomputed allow-set """
+    known_emojis: frozenset[str] = _known_emojis or _load_known_emojis()
+    return value in known_emojis or (isinstance(value, str) and _is_unknown_emoji(value))
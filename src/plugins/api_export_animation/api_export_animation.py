@@ -0,0 +1,260 @@
+import io
+import os
+import struct
+import zlib
+from abc import abstractmethod
+from array import array
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import BinaryIO, Iterable, Iterator
+from PIL import Image, GifImagePlugin
+
+from plugins.api_draw_table.api_draw_table import ApiDrawTable, _ContractCell
+
+
+_FORMATS: tuple[str, ...] = ('GIF', 'PNG', 'WEBP')
+_PALETTE_COLORS: int = 255
+_PNG_SIGNATURE: bytes = b'\x89PNG\r\n\x1a\n'
+_APNG_DISPOSE_NONE: int = 0
+_APNG_BLEND_SOURCE: int = 0
+# Lossless WebP keyframe distance (min, max), Pillow's defaults taken from gif2webp
+_WEBP_KEYFRAMES: tuple[int, int] = (9, 17)
+_WEBP_METHOD: int = 0
+
+
+@dataclass
+class _ContractFrame:
+    columns: int
+    rows: int
+
+    @property
+    @abstractmethod
+    def codes(self) -> array:
+        pass
+
+
+def _frame_hash(frame: _ContractFrame) -> bytes:
+    digest = blake2b(digest_size=16)
+    digest.update(struct.pack('<II', frame.columns, frame.rows))
+    digest.update(frame.codes.tobytes())
+    return digest.digest()
+
+
+def _dedup_frames(frames: Iterable[_ContractFrame], duration: int) -> Iterator[tuple[_ContractFrame, int]]:
+    """
+        Collapse runs of identical consecutive frames into one frame with the summed duration.
+    """
+    last: _ContractFrame | None = None
+    last_hash: bytes | None = None
+    count: int = 0
+
+    for frame in frames:
+        frame_hash: bytes = _frame_hash(frame)
+        if frame_hash == last_hash:
+            count += 1
+            continue
+
+        if last is not None:
+            yield last, duration * count
+        last, last_hash, count = frame, frame_hash, 1
+
+    if last is not None:
+        yield last, duration * count
+
+
+def _frame_cells(frame: _ContractFrame, values: tuple[str | None, ...]) -> list[_ContractCell]:
+    rows: int = frame.rows
+    return [
+        _ContractCell(column=index // rows, row=index % rows, value=values[code])
+        for index, code in enumerate(frame.codes)
+    ]
+
+
+def _global_palette(api_draw_table: ApiDrawTable, values: tuple[str | None, ...]) -> Image.Image:
+    """
+        Draw every palette value once into a strip and quantize it, so all frames share one color table.
+    """
+    cells: list[_ContractCell] = [_ContractCell(column=0, row=0, value=None)] + [
+        _ContractCell(column=column, row=0, value=value) for column, value in enumerate(values[1:], start=1)
+    ]
+    return api_draw_table.draw_table(cells=cells).quantize(colors=_PALETTE_COLORS, dither=Image.Dither.NONE)
+
+
+def _render_frames(
+        frames: Iterable[tuple[_ContractFrame, int]],
+        values: tuple[str | None, ...],
+        api_draw_table: ApiDrawTable,
+        palette: Image.Image
+) -> Iterator[tuple[Image.Image, int]]:
+    size: tuple[int, int] | None = None
+    for frame, duration in frames:
+        image: Image.Image = api_draw_table.draw_table(cells=_frame_cells(frame, values))
+        if size is None:
+            size = image.size
+        elif image.size != size:
+            raise ValueError(f'Frame size {image.size} differs from the first frame size {size}')
+        yield image.quantize(palette=palette, dither=Image.Dither.NONE), duration
+
+
+def _write_gif(fp: BinaryIO, frames: Iterator[tuple[Image.Image, int]], loop: int) -> int:
+    count: int = 0
+    for image, duration in frames:
+        if count == 0:
+            # The first frame carries the global color table, optimize would remap it away from the shared palette
+            header, _ = GifImagePlugin.getheader(image, info={'loop': loop, 'optimize': False})
+            fp.write(b''.join(header))
+        for chunk in GifImagePlugin.getdata(image, duration=duration):
+            fp.write(chunk)
+        count += 1
+
+    if count:
+        fp.write(b';')
+    return count
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def _png_chunks(data: bytes) -> Iterator[tuple[bytes, bytes]]:
+    offset: int = len(_PNG_SIGNATURE)
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, offset)
+        yield chunk_type, data[offset + 8:offset + 8 + length]
+        offset += length + 12
+
+
+def _write_apng(fp: BinaryIO, frames: Iterator[tuple[Image.Image, int]], count: int, loop: int) -> int:
+    """
+        Write an APNG chunk by chunk: each frame is encoded as a PNG on its own and its IDAT is rewrapped as fdAT.
+        The frame count has to be known upfront because acTL precedes the frames.
+    """
+    sequence: int = 0
+    written: int = 0
+    for image, duration in frames:
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        chunks: list[tuple[bytes, bytes]] = list(_png_chunks(buffer.getvalue()))
+
+        if written == 0:
+            fp.write(_PNG_SIGNATURE)
+            for chunk_type, data in chunks:
+                if chunk_type in (b'IHDR', b'PLTE', b'tRNS'):
+                    fp.write(_png_chunk(chunk_type, data))
+            fp.write(_png_chunk(b'acTL', struct.pack('>II', count, loop)))
+
+        fp.write(_png_chunk(b'fcTL', struct.pack(
+            '>IIIIIHHBB',
+            sequence, image.width, image.height, 0, 0,
+            min(duration, 0xFFFF), 1000, _APNG_DISPOSE_NONE, _APNG_BLEND_SOURCE
+        )))
+        sequence += 1
+
+        for chunk_type, data in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if written == 0:
+                fp.write(_png_chunk(b'IDAT', data))
+            else:
+                fp.write(_png_chunk(b'fdAT', struct.pack('>I', sequence) + data))
+                sequence += 1
+        written += 1
+
+    if written:
+        fp.write(_png_chunk(b'IEND', b''))
+    return written
+
+
+class _WebPAnimation:
+    """
+        Frame by frame use of the libwebp animation encoder behind Image.save(format='WEBP', save_all=True):
+        each frame is encoded when it is added, only encoded frames are kept until assemble().
+        Newer Pillow versions take the size as a tuple and images, earlier ones (10.x) width, height
+        and raw RGBX bytes with the size of every frame.
+    """
+
+    def __init__(self, size: tuple[int, int], loop: int):
+        from PIL import _webp
+
+        # Transparent background, no minimize_size, lossless keyframe distance, no allow_mixed, not verbose
+        options: tuple = (0, loop, False, *_WEBP_KEYFRAMES, False, False)
+        try:
+            self._encoder = _webp.WebPAnimEncoder(size, *options)
+            self._pass_image: bool = True
+        except TypeError:
+            self._encoder = _webp.WebPAnimEncoder(*size, *options)
+            self._pass_image = False
+
+    def add(self, image: Image.Image | None, timestamp: int) -> None:
+        """ Encode image shown from timestamp (ms), None ends the animation at timestamp """
+        # lossless, quality, alpha quality, method
+        options: tuple = (True, 100, 100, _WEBP_METHOD)
+        if self._pass_image:
+            self._encoder.add(None if image is None else image.convert('RGB').getim(), timestamp, *options)
+        elif image is None:
+            self._encoder.add(None, timestamp, 0, 0, '', *options)
+        else:
+            rgb: Image.Image = image.convert('RGB')
+            self._encoder.add(rgb.tobytes('raw', 'RGBX'), timestamp, rgb.width, rgb.height, 'RGBX', *options)
+
+    def assemble(self) -> bytes:
+        data: bytes | None = self._encoder.assemble('', '', '')
+        if data is None:
+            raise OSError('Cannot write file as WebP (encoder returned None)')
+        return data
+
+
+def _write_webp(fp: BinaryIO, frames: Iterator[tuple[Image.Image, int]], loop: int) -> int:
+    """ Stream frames into the WebP animation encoder, a frame is released once it is encoded """
+    animation: _WebPAnimation | None = None
+    timestamp: int = 0
+    count: int = 0
+    for image, duration in frames:
+        if animation is None:
+            animation = _WebPAnimation(image.size, loop)
+        animation.add(image, timestamp)
+        timestamp += duration
+        count += 1
+
+    if animation is None:
+        return 0
+    animation.add(None, timestamp)
+    fp.write(animation.assemble())
+    return count
+
+
+def api_export_animation(
+        filepath: str,
+        frames: list[_ContractFrame],
+        values: tuple[str | None, ...],
+        font: tuple[str, int],
+        bg: str,
+        duration: int = 100,
+        loop: int = 0,
+        image_format: str | None = None
+) -> int:
+    """
+        Export frames as an animated GIF, APNG or WebP, the format is taken from the file extension by default.
+        Identical consecutive frames are merged into a longer frame, every frame is quantized against one palette
+        and rendered only when the encoder asks for it. Returns the number of frames written.
+    """
+    if image_format is None:
+        image_format = Image.registered_extensions().get(os.path.splitext(filepath)[1].lower())
+    if image_format not in _FORMATS:
+        raise ValueError(f'Unsupported animation format: {image_format}')
+    if duration <= 0:
+        raise ValueError('Frame duration must be positive')
+
+    api_draw_table = ApiDrawTable(font=font, bg=bg)
+    palette: Image.Image = _global_palette(api_draw_table, values)
+    rendered: Iterator[tuple[Image.Image, int]] = _render_frames(
+        _dedup_frames(frames, duration), values, api_draw_table, palette
+    )
+
+    with open(filepath, 'wb') as fp:
+        if image_format == 'GIF':
+            return _write_gif(fp, rendered, loop)
+        if image_format == 'PNG':
+            count: int = sum(1 for _ in _dedup_frames(frames, duration))
+            return _write_apng(fp, rendered, count, loop)
+        return _write_webp(fp, rendered, loop)
@@ -1,11 +1,30 @@
 import datetime
+import gzip
+import io
 from abc import abstractmethod
+from array import array
 from dataclasses import dataclass
+from typing import Sequence, TextIO
 import json
 
+from plugins.api_atomic_write.api_atomic_write import api_atomic_write
+
+
+# v1: {frames, date, frame:i: {cells, text}}, cells are lists of columns with the emoji (or null) of every cell
+# v2: {version, frames, date, palette, frame:i: {columns, rows, rle}}, palette is a list of emojis (palette[0] is null)
+#     and rle holds every row as [code, count, code, count, ...] of palette codes
+_VERSIONS: tuple[int, ...] = (1, 2)
+
 
 @dataclass
 class _ContractArtBoards:
+    columns: int
+    rows: int
+
+    @property
+    @abstractmethod
+    def codes(self) -> array:
+        pass
 
     @abstractmethod
     def convert_to_text(self, replace_none: str):
@@ -16,14 +35,95 @@ class _ContractArtBoards:
         pass
 
 
-def api_export_frames(filepath: str, frames: list[_ContractArtBoards]):
-    output: dict = dict(frames=len(frames), date=datetime.datetime.now().__str__())
+def _write_member(file: TextIO, encoder: json.JSONEncoder, key: str, value, first: bool, indent: int | None):
+    if indent is None:
+        file.write(('' if first else ',') + json.dumps(key, ensure_ascii=False) + ':')
+        for chunk in encoder.iterencode(value):
+            file.write(chunk)
+        return
+
+    # Same layout as json.dump(indent=indent): the member is one level deep, so its nested lines shift once
+    newline: str = '\n' + ' ' * indent
+    file.write(('' if first else ',') + newline + json.dumps(key, ensure_ascii=False) + ': ')
+    for chunk in encoder.iterencode(value):
+        file.write(chunk.replace('\n', newline))
+
+
+def _encode_rle(codes: array, rows: int) -> list[list[int]]:
+    output: list[list[int]] = list()
+    for row in range(rows):
+        runs: list[int] = list()
+        for code in codes[row::rows]:
+            if runs and runs[-2] == code:
+                runs[-1] += 1
+            else:
+                runs += [code, 1]
+        output.append(runs)
+    return output
+
+
+def _write_v1(file: TextIO, frames: Sequence[_ContractArtBoards], indent: int | None):
+    encoder = json.JSONEncoder(
+        ensure_ascii=False,
+        indent=indent,
+        separators=(',', ':') if indent is None else (',', ': ')
+    )
+
+    file.write('{')
+    _write_member(file, encoder, 'frames', len(frames), True, indent)
+    _write_member(file, encoder, 'date', datetime.datetime.now().__str__(), False, indent)
 
     for i, frame in enumerate(frames):
-        output[f'frame:{i}'] = {
+        _write_member(file, encoder, f'frame:{i}', {
             'cells': frame.get_cells(only_value=True),
             'text': frame.convert_to_text(replace_none='▫️')
-        }
+        }, False, indent)
+
+    file.write('}' if indent is None else '\n}')
+
+
+def _write_v2(file: TextIO, frames: Sequence[_ContractArtBoards], values: Sequence[str | None]):
+    # One member per line, values are always compact (indenting every code would undo the run-length encoding)
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    file.write('{\n')
+    file.write(f'"version":2,\n"frames":{len(frames)},\n')
+    file.write(f'"date":{encoder.encode(datetime.datetime.now().__str__())},\n')
+    file.write(f'"palette":{encoder.encode(list(values))}')
+
+    for i, frame in enumerate(frames):
+        file.write(f',\n"frame:{i}":')
+        file.write(encoder.encode({
+            'columns': frame.columns,
+            'rows': frame.rows,
+            'rle': _encode_rle(frame.codes, frame.rows)
+        }))
+
+    file.write('\n}')
+
+
+def api_export_frames(
+        filepath: str,
+        frames: Sequence[_ContractArtBoards],
+        indent: int | None = 4,
+        version: int = 1,
+        values: Sequence[str | None] | None = None
+):
+    """
+        Stream frames to a JSON file one by one, so only a single frame is serialized at a time.
+        Version 1 keeps cells and text of every frame, indent=None drops pretty-printing.
+        Version 2 stores the palette values once and run-length encoded rows of codes (indent is not used).
+        A filepath ending with .gz is gzip compressed.
+    """
+    if version not in _VERSIONS:
+        raise ValueError(f'Invalid version: {version} (not in {_VERSIONS})')
+    if version == 2 and values is None:
+        raise ValueError('Version 2 needs the palette values of the frames')
 
-    with open(file=filepath, encoding='utf-8', mode='w') as file:
-        json.dump(output, fp=file, ensure_ascii=False, indent=4)
+    with api_atomic_write(filepath) as raw:
+        stream = gzip.GzipFile(fileobj=raw, mode='wb') if filepath.endswith('.gz') else raw
+        with io.TextIOWrapper(stream, encoding='utf-8') as file:
+            if version == 1:
+                _write_v1(file, frames, indent)
+            else:
+                _write_v2(file, frames, values)
@@ -0,0 +1,74 @@
+import os
+import multiprocessing
+from abc import abstractmethod
+from array import array
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+from plugins.api_draw_table.api_draw_table import ApiDrawTable, _ContractCell
+
+
+_CODE_TYPE: str = 'H'
+_CHUNK_SIZE: int = 8
+
+# Worker process state, set once by _init_worker
+_api_draw_table: ApiDrawTable | None = None
+_values: tuple[str | None, ...] = tuple()
+
+
+@dataclass
+class _ContractFrame:
+    columns: int
+    rows: int
+
+    @property
+    @abstractmethod
+    def codes(self) -> array:
+        pass
+
+
+def _init_worker(font: tuple[str, int], bg: str, values: tuple[str | None, ...]) -> None:
+    global _api_draw_table, _values
+    _api_draw_table = ApiDrawTable(font=font, bg=bg)
+    _values = values
+
+
+def _export_frame(job: tuple[str, int, int, bytes]) -> str:
+    filepath, columns, rows, data = job
+    codes: array = array(_CODE_TYPE)
+    codes.frombytes(data)
+
+    cells: list[_ContractCell] = [
+        _ContractCell(column=index // rows, row=index % rows, value=_values[code]) for index, code in enumerate(codes)
+    ]
+    _api_draw_table.draw_table(cells=cells).save(filepath, format='PNG')
+    return filepath
+
+
+def api_export_images(
+        directory: str,
+        frames: list[_ContractFrame],
+        values: tuple[str | None, ...],
+        font: tuple[str, int],
+        bg: str,
+        workers: int | None = None
+) -> list[str]:
+    """
+        Render every frame to a numbered PNG (frame-0000.png, ...) in a pool of processes.
+        Frames are sent as raw palette codes, the palette values are sent once per worker.
+    """
+    os.makedirs(directory, exist_ok=True)
+    width: int = max(4, len(str(len(frames) - 1)))
+    jobs: list[tuple[str, int, int, bytes]] = [
+        (os.path.join(directory, f'frame-{i:0{width}d}.png'), frame.columns, frame.rows, frame.codes.tobytes())
+        for i, frame in enumerate(frames)
+    ]
+
+    # Spawned, not forked: a fork of the running Qt application would inherit its threads and locks
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(font, bg, values)
+    ) as executor:
+        return list(executor.map(_export_frame, jobs, chunksize=_CHUNK_SIZE))
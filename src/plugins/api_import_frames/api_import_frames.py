@@ -0,0 +1,100 @@
+import gzip
+import json
+from array import array
+
+
+_CODE_TYPE: str = 'H'
+_GZIP_MAGIC: bytes = b'\x1f\x8b'
+
+
+def _frame_codes(frame: dict, codes: dict[str | None, int], values: list[str | None]) -> tuple[int, int, array]:
+    cells: list | None = frame.get('cells') if isinstance(frame, dict) else None
+    if not isinstance(cells, list) or not cells or not isinstance(cells[0], list) or not cells[0]:
+        raise ValueError('Invalid frame: "cells" must be a non-empty list of columns')
+
+    columns, rows = len(cells), len(cells[0])
+    grid: array = array(_CODE_TYPE, bytes(2 * columns * rows))
+    index: int = 0
+    for column in cells:
+        if len(column) != rows:
+            raise ValueError(f'Invalid frame: columns of {len(column)} and {rows} cells')
+        for value in column:
+            code: int | None = codes.get(value)
+            if code is None:
+                if not isinstance(value, str):
+                    raise ValueError(f'Invalid cell value: {value}')
+                code = codes[value] = len(values)
+                values.append(value)
+            grid[index] = code
+            index += 1
+    return columns, rows, grid
+
+
+def _frame_codes_rle(frame: dict, palette_size: int) -> tuple[int, int, array]:
+    if not isinstance(frame, dict):
+        raise ValueError('Invalid frame: not an object')
+    columns, rows, rle = frame.get('columns'), frame.get('rows'), frame.get('rle')
+    if not isinstance(columns, int) or not isinstance(rows, int) or not isinstance(rle, list) or len(rle) != rows:
+        raise ValueError('Invalid frame: "columns", "rows" and one "rle" list per row are required')
+
+    grid: array = array(_CODE_TYPE, bytes(2 * columns * rows))
+    for row, runs in enumerate(rle):
+        column: int = 0
+        for code, count in zip(runs[0::2], runs[1::2]):
+            if not isinstance(code, int) or not isinstance(count, int) or not 0 <= code < palette_size \
+                    or count <= 0 or column + count > columns:
+                raise ValueError(f'Invalid frame: run ({code}, {count}) of row {row}')
+            # Codes are packed column by column, a run of a row is strided by rows
+            start: int = column * rows + row
+            grid[start:start + count * rows:rows] = array(_CODE_TYPE, [code]) * count
+            column += count
+        if column != columns:
+            raise ValueError(f'Invalid frame: row {row} has {column} cells (expected {columns})')
+    return columns, rows, grid
+
+
+def _read_json(filepath: str) -> dict:
+    with open(file=filepath, mode='rb') as file:
+        data: bytes = file.read()
+    if data.startswith(_GZIP_MAGIC):
+        data = gzip.decompress(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def api_import_frames(filepath: str) -> tuple[tuple[str | None, ...], list[tuple[int, int, array]]]:
+    """
+        Read a file written by api_export_frames (version 1 or 2, plain or gzip compressed): the palette
+        (values[0] is None) and (columns, rows, codes) of every frame, codes are packed column by column.
+        Version 1 is read from "cells" only, "text" is derived from it.
+        Frames are read in order up to "frames" or the first missing "frame:N".
+    """
+    data: dict = _read_json(filepath)
+
+    if not isinstance(data, dict) or not isinstance(data.get('frames'), int):
+        raise ValueError(f'Invalid frames file: {filepath}')
+
+    version: int = data.get('version', 1)
+    frames: list[tuple[int, int, array]] = list()
+
+    if version == 1:
+        codes: dict[str | None, int] = {None: 0}
+        values: list[str | None] = [None]
+        for i in range(data['frames']):
+            frame: dict | None = data.get(f'frame:{i}')
+            if frame is None:
+                break
+            frames.append(_frame_codes(frame, codes, values))
+        return tuple(values), frames
+
+    if version == 2:
+        palette: list | None = data.get('palette')
+        if not isinstance(palette, list) or not palette or palette[0] is not None:
+            raise ValueError(f'Invalid palette: {filepath} (a list starting with null is required)')
+        for i in range(data['frames']):
+            frame: dict | None = data.get(f'frame:{i}')
+            if frame is None:
+                break
+            frames.append(_frame_codes_rle(frame, len(palette)))
+        return tuple(palette), frames
+
+    raise ValueError(f'Unsupported frames file version: {version}')
@@ -16,6 +16,52 @@ SETTINGS_MESSAGEBOX_ICON: dict = {
 }
 
 
+SETTINGS_ART_BOARD_STORAGE: dict = {
+    # Keep frames as keyframes + sparse cell deltas (long animations)
+    'delta_frames': False,
+    'keyframe_interval': 32,
+    'cache_size': 8,
+}
+
+# Undo / redo history limit (bytes)
+SETTINGS_ART_BOARD_JOURNAL_BUDGET: int = 4 * 1024 * 1024
+
+SETTINGS_DRAW_TABLE: dict = {
+    'font': ('seguiemj.ttf', 24),
+    'bg': 'black',
+}
+
+# Project JSON indentation (version 1 only), None writes compact JSON
+SETTINGS_EXPORT_FRAMES_INDENT: int | None = 4
+
+# Project JSON schema: 1 - cells and text of every frame, 2 - palette + run-length encoded rows
+SETTINGS_EXPORT_FRAMES_VERSION: int = 2
+
+# Save the opened project in background after 'idle' milliseconds without edits
+SETTINGS_AUTOSAVE: dict = {
+    'enabled': True,
+    'idle': 2000,
+}
+
+# An .emart project is rewritten in full once the incremental saves appended to it outgrow
+# max(compact_min bytes, compact_ratio * size of the full part)
+SETTINGS_PROJECT_LOG: dict = {
+    'compact_min': 1024 * 1024,
+    'compact_ratio': 0.5,
+}
+
+# Animated GIF / APNG / WebP export, frame duration in milliseconds, loop 0 repeats forever
+SETTINGS_EXPORT_ANIMATION: dict = {
+    'duration': 100,
+    'loop': 0,
+}
+
+# QSettings scope of the UI state restored on the next start (expanded emoji store categories)
+SETTINGS_UI_STATE: dict = {
+    'organization': 'pyside6-emoji-art',
+    'application': 'EmojiArt',
+}
+
 SETTINGS_SHORTCUTS: dict = path_read_file('app-shortcuts.json')
 
 SETTINGS_SHORTCUTS_HTML: dict = {
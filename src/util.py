@@ -1,4 +1,4 @@
-from PySide6.QtCore import QSize, Qt
+from PySide6.QtCore import QSize, Qt, QObject, QRunnable, Signal
 from PySide6.QtGui import QPixmap, QFont, QPainter
 from PySide6.QtWidgets import QWidget, QMessageBox
 from settings import SETTINGS_MESSAGEBOX_ICON
@@ -13,6 +13,32 @@ class UtilMetaSingleton(type):
         return cls._instances[cls]
 
 
+class UtilWorkerSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class UtilWorker(QRunnable):
+    """
+        Job for a QThreadPool: runs function(*args) in a worker thread.
+        Signals are created in the calling (GUI) thread, so connected slots are queued back to it.
+    """
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.signals = UtilWorkerSignals()
+        self._function = function
+        self._args = args
+
+    def run(self):
+        try:
+            result = self._function(*self._args)
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+            return
+        self.signals.finished.emit(result)
+
+
 def util_switch_to_view(current_view: QWidget, new_view: QWidget) -> bool:
     if current_view is None or new_view is None:
         return False
@@ -88,26 +88,7 @@ class _TopPanel(QFrame):
         self._vbox_layout.setContentsMargins(0, 0, 0, 0)
 
         # Fill emoji store
-        json_data: dict = api_emoji_store.read_json_file()
-        rows: list = list()
-
-        def add_row(row: list[str]):
-            self.component_emoji_store.add_row(row=row)
-
-        def add_title(category: str):
-            self.component_emoji_store.add_title(category)
-
-        for category, value in json_data.items():
-            add_title(category=category)
-            for subcategories, emojis in value.items():
-                for emoji in emojis:
-                    if len(rows) < 6:
-                        rows.append(emoji['character'])
-                        continue
-
-                    add_row(row=rows)
-                    rows.clear()
-                    continue
+        self.component_emoji_store.set_index(api_emoji_store.read_index())
 
 
 class _BottomPanel(QFrame):